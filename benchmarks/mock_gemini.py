@@ -0,0 +1,116 @@
+"""Local stand-in for the Gemini generateContent API, used by the benchmarks.
+
+Responses are built from the user prompt by a ``respond`` callable returning a list of
+instructions; continuation requests for a truncated response get the remaining ones.
+Latency, RECITATION answers, malformed JSON and 429 errors can be injected every n-th
+request.
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+
+class MockGemini:
+    def __init__(self, respond: Callable[[str], List[Dict]], latency: float = 0.0,
+                 recitation_every: int = 0, malformed_every: int = 0, rate_limit_every: int = 0):
+        self.respond = respond
+        self.latency = latency
+        self.recitation_every = recitation_every
+        self.malformed_every = malformed_every
+        self.rate_limit_every = rate_limit_every
+        self.requests = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1beta"
+
+    def __enter__(self) -> "MockGemini":
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                mock._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.bytes_received = 0
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        body = handler.rfile.read(int(handler.headers["Content-Length"]))
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += len(body)
+            number = self.requests
+        if self.latency:
+            time.sleep(self.latency)
+
+        if "/cachedContents" in handler.path:
+            self._send_json(handler, 400, {"error": {"message": "Cached content is too small"}})
+            return
+        if self.rate_limit_every and number % self.rate_limit_every == 0:
+            handler.send_response(429)
+            handler.send_header("Retry-After", "0")
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+        if self.recitation_every and number % self.recitation_every == 0:
+            self._send_json(handler, 200, {"candidates": [{"finishReason": "RECITATION"}]})
+            return
+
+        request = json.loads(body)
+        prompts = [content["parts"][0]["text"] for content in request["contents"] if content.get("role") != "model"]
+        continued = re.search(r"cut off after (\d+) complete instructions", prompts[-1])
+        if continued:
+            instructions = self.respond(prompts[-2])[int(continued.group(1)):]
+        else:
+            instructions = self.respond(prompts[-1])
+        text = "```json\n" + json.dumps(instructions) + "\n```"
+        if self.malformed_every and number % self.malformed_every == 0:
+            text = text[:len(text) // 2]
+        usage = {"promptTokenCount": len(body) // 4, "candidatesTokenCount": len(text) // 4}
+
+        if ":streamGenerateContent" in handler.path:
+            handler.send_response(200)
+            handler.send_header("Content-Type", "text/event-stream")
+            handler.end_headers()
+            for start in range(0, len(text), 256):
+                chunk = {"candidates": [{"content": {"parts": [{"text": text[start:start + 256]}]}}]}
+                if start + 256 >= len(text):
+                    chunk["usageMetadata"] = usage
+                handler.wfile.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+            return
+        self._send_json(handler, 200, {"candidates": [{"content": {"parts": [{"text": text}]}, "finishReason": "STOP"}],
+                                       "usageMetadata": usage})
+
+    @staticmethod
+    def _send_json(handler: BaseHTTPRequestHandler, status: int, data: Dict):
+        payload = json.dumps(data).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+
+def app_name(prompt: str) -> str:
+    """Return the app a generator prompt asks about, or ``authentication``."""
+    match = re.search(r"integrate (\w+) into", prompt)
+    return match.group(1) if match else "authentication"
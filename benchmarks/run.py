@@ -0,0 +1,169 @@
+"""Offline end-to-end benchmarks for ProjectGenerator.generate.
+
+Runs generation scenarios against a local mock of the Gemini API and reports wall time,
+request count, bytes sent and files written, compared with ``baselines.json``. Scenarios
+are deterministic, retry jitter included, so the counts are exact. Wall time depends on
+the machine, so it is compared as a ratio to the ``apps_10`` reference scenario, which is
+run first in every invocation:
+
+    python benchmarks/run.py                      # all scenarios
+    python benchmarks/run.py apps_10 flaky        # selected scenarios
+    python benchmarks/run.py --update-baselines   # record new baselines
+
+Exits with status 1 when a scenario regresses. Counts must not grow; the wall time ratio
+may exceed its baseline by ``--tolerance`` (relative).
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_gemini import MockGemini, app_name  # noqa: E402
+
+BASELINES = Path(__file__).resolve().parent / "baselines.json"
+QUIET_MODULES = ["api_client", "dependencies", "generator", "plan", "tracing"]
+REFERENCE = "apps_10"
+
+
+# Packages the generator itself runs on, so dependency scenarios never reach the network
+INSTALLED_PACKAGES = ["click", "rich", "requests", "PyYAML", "InquirerPy", "pfzy", "prompt-toolkit", "wcwidth",
+                      "markdown-it-py", "mdurl", "Pygments", "urllib3", "certifi", "idna", "charset-normalizer"]
+
+
+SCENARIOS = {
+    "apps_1": {"apps": 1},
+    "apps_10": {"apps": 10},
+    "apps_50": {"apps": 50},
+    "apps_10_workers": {"apps": 10, "options": {"workers": 8}},
+    "apps_10_compact": {"apps": 10, "options": {"context": "compact"}},
+    "apps_10_stream": {"apps": 10, "options": {"stream": True}},
+    "large_settings": {"apps": 5, "settings_per_app": 200},
+    "many_dependencies": {"apps": 10, "dependencies": len(INSTALLED_PACKAGES)},
+    "flaky": {"apps": 5, "mock": {"rate_limit_every": 3, "recitation_every": 5, "malformed_every": 7}},
+}
+
+
+def make_responder(scenario: Dict):
+    settings_per_app = scenario.get("settings_per_app", 3)
+    dependencies = INSTALLED_PACKAGES[:scenario.get("dependencies", 2)]
+
+    def respond(prompt: str) -> List[Dict]:
+        app = app_name(prompt)
+        module_body = "".join(f"def view_{i}(request):\n    return {{'app': '{app}', 'view': {i}}}\n\n\n"
+                              for i in range(40))
+        instructions = [{"filename": f"{app}/{module}.py", "content": f'"""{app} {module}"""\n' + module_body,
+                         "type": "file"}
+                        for module in ("__init__", "models", "views", "urls", "admin", "apps", "serializers", "tests")]
+        instructions.append({"variable_name": "INSTALLED_APPS", "value": app, "action": "add",
+                             "type": "update_settings"})
+        instructions += [{"variable_name": f"{app.upper()}_SETTING_{i}", "value": f"value {i}",
+                          "type": "update_settings"} for i in range(settings_per_app)]
+        instructions.append({"dependencies": dependencies, "type": "dependencies"})
+        return instructions
+
+    return respond
+
+
+def run_scenario(mock: MockGemini, name: str, scenario: Dict) -> Dict:
+    from django_ai_generator.generator import ProjectGenerator
+    from django_ai_generator.tracing import tracer
+
+    mock.respond = make_responder(scenario)
+    mock_options = scenario.get("mock", {})
+    mock.recitation_every = mock_options.get("recitation_every", 0)
+    mock.malformed_every = mock_options.get("malformed_every", 0)
+    mock.rate_limit_every = mock_options.get("rate_limit_every", 0)
+    mock.reset()
+    tracer.events.clear()
+    # Retry backoff is jittered
+    random.seed(0)
+
+    apps = [{"name": f"app{i}", "description": f"App number {i}"} for i in range(scenario["apps"])]
+    with tempfile.TemporaryDirectory() as output_dir:
+        options = {"type": "Django", "apps": apps, "cache": False, "output_dir": output_dir,
+                   **scenario.get("options", {})}
+        started = time.perf_counter()
+        succeeded = ProjectGenerator(f"bench_{name}", options).generate()
+        wall_time = time.perf_counter() - started
+    if not succeeded:
+        raise RuntimeError(f"Scenario {name} failed")
+
+    files_written = sum(event["args"].get("written", 0) for event in tracer.events if event["name"] == "write_files")
+    return {"wall_time": round(wall_time, 3), "requests": mock.requests, "bytes_sent": mock.bytes_received,
+            "files_written": files_written}
+
+
+def regressions(result: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    found = []
+    for metric in ("requests", "bytes_sent", "files_written"):
+        if metric in baseline and result[metric] > baseline[metric]:
+            found.append(f"{metric} {baseline[metric]} -> {result[metric]}")
+    if "wall_ratio" in baseline and result["wall_ratio"] > baseline["wall_ratio"] * (1 + tolerance):
+        found.append(f"wall_ratio {baseline['wall_ratio']} -> {result['wall_ratio']}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", help="Scenarios to run (default: all)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock response latency in seconds")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative wall time ratio regression")
+    parser.add_argument("--update-baselines", action="store_true", help="Store the results as the new baselines")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    names = args.scenarios or list(SCENARIOS)
+    names = [REFERENCE] + [name for name in names if name != REFERENCE]
+    baselines = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+
+    with MockGemini(respond=lambda prompt: [], latency=args.latency) as mock:
+        # The API root is read when api_client is imported, so the mock must be up first
+        os.environ["GEMINI_API_BASE"] = mock.url
+        os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+        for module in QUIET_MODULES:
+            importlib.import_module(f"django_ai_generator.{module}").console.quiet = True
+        from rich.console import Console
+        from rich.table import Table
+
+        table = Table(title="Benchmarks")
+        for column in ("Scenario", "Wall time", "Ratio", "Requests", "Bytes sent", "Files written", "Status"):
+            table.add_column(column, justify="left" if column in ("Scenario", "Status") else "right")
+        failed = False
+        results = {}
+        for name in names:
+            result = results[name] = run_scenario(mock, name, SCENARIOS[name])
+            wall_time = result.pop("wall_time")
+            if name != REFERENCE:
+                result["wall_ratio"] = round(wall_time / reference_time, 2)
+            else:
+                reference_time = wall_time
+            found = regressions(result, baselines.get(name, {}), args.tolerance)
+            failed = failed or bool(found)
+            status = "[red]" + "; ".join(found) + "[/red]" if found else "[green]ok[/green]"
+            if name not in baselines:
+                status = "[yellow]no baseline[/yellow]"
+            table.add_row(name, f"{wall_time:.2f}s", f"{result.get('wall_ratio', 1.0):.2f}", str(result["requests"]),
+                          str(result["bytes_sent"]), str(result["files_written"]), status)
+        Console().print(table)
+
+    if args.update_baselines:
+        baselines.update(results)
+        BASELINES.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baselines written to {BASELINES}")
+    elif failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
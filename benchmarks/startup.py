@@ -0,0 +1,99 @@
+"""Startup budget for the django-gen entry point.
+
+Runs ``django-gen --help``, ``--version`` and the replay of an empty plan in fresh
+interpreters and reports the median time each takes beyond a bare ``python -c pass``,
+together with the heavy modules it imported:
+
+    python benchmarks/startup.py               # all paths, 7 runs each
+    python benchmarks/startup.py --runs 15
+
+Exits with status 1 when a path exceeds its budget or imports a module it must not.
+Replay only creates a project from files already on disk, so it must not load the
+Gemini client (requests) or the interactive prompts (InquirerPy).
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+SRC = str(Path(__file__).resolve().parent.parent / "src")
+
+# Prints the imported top-level packages on exit, however the CLI exits
+CHILD = ("import atexit, json, sys; "
+         "atexit.register(lambda: sys.stderr.write("
+         "'\\nMODULES ' + json.dumps(sorted({m.split('.')[0] for m in sys.modules})) + '\\n')); "
+         f"sys.path.insert(0, {SRC!r}); "
+         "sys.argv[0] = 'django-gen'; "
+         "from django_ai_generator.cli import main; main()")
+
+HEAVY_MODULES = ["InquirerPy", "prompt_toolkit", "requests", "urllib3", "rich", "django", "yaml"]
+
+# Budgets are in milliseconds beyond interpreter startup
+PATHS = {
+    "help": {"args": ["--help"], "budget": 100, "forbidden": ["InquirerPy", "prompt_toolkit", "requests", "rich"]},
+    "version": {"args": ["--version"], "budget": 100, "forbidden": ["InquirerPy", "prompt_toolkit", "requests", "rich"]},
+    "replay": {"args": ["--replay", "plan.json"], "budget": 250,
+               "forbidden": ["InquirerPy", "prompt_toolkit", "requests"]},
+}
+
+
+def run(args: List[str], cwd: str) -> Tuple[float, List[str]]:
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, "-c", CHILD, *args], cwd=cwd, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if process.returncode != 0:
+        raise RuntimeError(f"django-gen {' '.join(args)} failed:\n{process.stdout}{process.stderr}")
+    modules = next(json.loads(line[len("MODULES "):]) for line in process.stderr.splitlines()
+                   if line.startswith("MODULES "))
+    return elapsed, modules
+
+
+def median_time(command: List[str], runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, check=True, capture_output=True)
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7, help="Runs per path; the median is reported")
+    args = parser.parse_args()
+
+    failed = False
+    plan = {"version": 1, "project": "startup_bench", "options": {"type": "Django"}, "instructions": []}
+    baseline = median_time([sys.executable, "-c", "pass"], args.runs)
+    print(f"Interpreter startup: {baseline * 1000:.0f}ms")
+    for name, path in PATHS.items():
+        results = []
+        for _ in range(args.runs):
+            # Replay creates the project, so every run starts in an empty directory
+            with tempfile.TemporaryDirectory() as cwd:
+                Path(cwd, "plan.json").write_text(json.dumps(plan))
+                results.append(run(path["args"], cwd))
+        elapsed = (statistics.median(time for time, _ in results) - baseline) * 1000
+        modules = results[0][1]
+        problems = []
+        if elapsed > path["budget"]:
+            problems.append(f"{elapsed:.0f}ms > {path['budget']}ms budget")
+        imported = [module for module in path["forbidden"] if module in modules]
+        if imported:
+            problems.append(f"imports {', '.join(imported)}")
+        failed = failed or bool(problems)
+        heavy = [module for module in HEAVY_MODULES if module in modules]
+        print(f"{name:<8} {elapsed:6.0f}ms  heavy imports: {', '.join(heavy) or 'none':<40} "
+              f"{'; '.join(problems) or 'ok'}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
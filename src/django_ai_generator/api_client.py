@@ -1,69 +1,194 @@
+import copy
+import functools
 import json
-from typing import List, Dict
+import multiprocessing
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Optional
 import os
 
 import requests
+from requests.adapters import HTTPAdapter
 from rich.console import Console
-from rich.pretty import pprint
+from rich.table import Table
+
+from .cache import ResponseCache
+from .context import ProjectManifest
+from .parsing import ParsedResponse, describe_instruction, parse_instructions
+from .routing import ModelRouter
+from .stream import InstructionStreamParser
+from .tracing import tracer
+
 console = Console()
 
+API_ROOT = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+API_URL = f"{API_ROOT}/models"
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Longest wait between retries, also for a server asking for more with Retry-After
+MAX_RETRY_DELAY = 30.0
+
+_rate_limiter = None
+
+
+class RateLimiter:
+    """Spaces out API requests to at most ``requests_per_minute``, across processes.
+
+    Built from multiprocessing primitives so one limiter can be handed to every worker of
+    a process pool.
+    """
+
+    def __init__(self, requests_per_minute: float, context=None):
+        context = context or multiprocessing.get_context()
+        self.interval = 60.0 / requests_per_minute
+        self._lock = context.Lock()
+        self._next = context.Value("d", 0.0, lock=False)
+
+    def acquire(self):
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next.value)
+            self._next.value = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def set_rate_limiter(limiter: Optional[RateLimiter]):
+    """Make every GeminiClient in this process wait on ``limiter`` before each request."""
+    global _rate_limiter
+    _rate_limiter = limiter
+
+
+@functools.lru_cache(maxsize=None)
+def _read_system_instructions() -> str:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(script_dir, "system_instructions.txt"), "r") as f:
+        return f.read()
+
 
 class GeminiClient:
     def __init__(self, project_name: str, options: Dict = None):
         self.project_name = project_name
         self.options = options or {}
         self.api_key = os.getenv("GEMINI_API_KEY")
-        self.model = "gemini-exp-1114"
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY environment variable not set")
         self.chat = []
+        self.cache = ResponseCache() if self.options.get("cache", True) else None
+        self.max_retries = self.options.get("max_retries", 5)
+        self.max_continuations = self.options.get("max_continuations", 3)
+        self.timeout = self.options.get("timeout", (10, 300))
+        self.session = self._create_session()
+        self.calls = []
+        self._calls_lock = threading.Lock()
+        self.router = ModelRouter(self.options.get("models"))
+        self.hedge_after = self.options.get("hedge_after")
+        self.hedges = {"sent": 0, "won": 0}
+        self.context_mode = self.options.get("context", "full")
+        self.manifest = ProjectManifest()
+        self.context_cache = self.options.get("context_cache", False)
+        self._cached_contents = {}
+        self._cached_contents_lock = threading.Lock()
         self._load_system_instructions()
 
-    def get_authentication_instructions(self, type: str, description: str = None):
+    def fork(self) -> "GeminiClient":
+        """Return a copy of the client with its own chat history, for use from another thread."""
+        client = copy.copy(self)
+        client.chat = list(self.chat)
+        client.manifest = self.manifest.copy()
+        return client
+
+    def extend_history(self, turns: List[Dict]):
+        """Append chat turns produced elsewhere, e.g. by a fork, and record their responses in the manifest."""
+        self.chat.extend(turns)
+        for turn in turns:
+            if turn.get("role") == "model":
+                self.manifest.record(json.loads(turn["parts"][0]["text"]))
+
+    def get_authentication_instructions(self, type: str, description: str = None, stream: bool = False,
+                                        template: Optional[List[Dict]] = None, customize: bool = False):
         prompt = self._build_authentication_prompt(type, description)
-        response = self._send_request(prompt)
+        if template is not None:
+            return self._use_template(prompt, template, description if customize else None, "auth")
+        if stream:
+            return self._stream_request(prompt, "auth")
+        response = self._send_request(prompt, "auth")
         return response
 
     def get_project_instructions(self, name: str, features: List[Dict]) -> dict:
         prompt = self._build_prompt(name, features)
         system_instructions = self._system_instruction
+        contents = [{"parts": [{"text": prompt}]}]
+        route = self.router.route_key("project")
+        cache_key = self.cache.key(route, system_instructions, contents) if self.cache else None
+        if cache_key:
+            content = self.cache.get(cache_key)
+            if content is not None:
+                return content
         try:
-            content = None
-            while True:
-                headers = {"Content-Type": "application/json"}
-                data = {"system_instruction": {"parts": {"text": system_instructions}},
-                        "contents": [{"parts": [{"text": prompt}]}]}
-                url = (f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest"
-                       f":generateContent?key={self.api_key}")
-                response = requests.post(url, json=data, headers=headers)
-                if response.status_code != 200:
-                    console.print(f"[red]Error generating instructions from Gemini API: {response.status_code} - {response.text}[/red]")
-                    raise Exception(f"Failed to generate instructions from Gemini API")
-                data = response.json()
-                if not data.get("candidates", [{}])[0].get("finishReason") == "RECITATION":
-                    try:
-                        content = self._parse_response(data)
-                        break
-                    except:
-                        continue
-                print("[retrying...]")
+            content = self._generate_routed("project", system_instructions, contents)
+            if cache_key:
+                self.cache.set(cache_key, content)
             return content
 
         except Exception as e:
             console.print(f"[red]Error getting instructions from Gemini API: {str(e)}[/red]")
             raise
 
-    def get_app_instructions(self, app: Dict):
+    def get_app_instructions(self, app: Dict, stream: bool = False, template: Optional[List[Dict]] = None,
+                             customize: bool = False):
         prompt = (f"I need help to integrate {app['name']} into my project. Please provide me with the necessary files "
                   f"and configurations to fully implement it. Description | Request: {app['description']}")
-        return self._send_request(prompt)
+        if template is not None:
+            return self._use_template(prompt, template, app["description"] if customize else None, "app")
+        if stream:
+            return self._stream_request(prompt, "app")
+        return self._send_request(prompt, "app")
 
     def refactor_dependencies(self, dependencies: List[Dict[str, str]]):
         prompt = "I got errors when instaling this packages. please refactor it:\n"
         prompt += "\n".join([f"name: {item['name']}, error: {item['error']}" for item in dependencies])
         prompt += 'give in format: [{"dependencies": ["djangorestframework", "phonenumber"], "type": "dependencies"}]'
         prompt += 'give only refactored dependencies, others are already installed'
-        return self._send_request(prompt)
+        return self._send_request(prompt, "refactor")
+
+    def repair_files(self, files: Dict[str, Dict]):
+        """Ask for fixed versions of generated files that fail validation, all in one request.
+
+        ``files`` maps each path to its current ``content`` and its validation ``errors``.
+        """
+        prompt = "These generated files have errors. Fix them so the project imports cleanly:\n"
+        for path, file in files.items():
+            prompt += f"\nfilename: {path}\nerrors:\n" + "\n".join(f"- {error}" for error in file["errors"])
+            prompt += f"\ncontent:\n{file['content']}\n"
+        prompt += ('\ngive in format: [{"filename": "app/views.py", "content": "...", "type": "file"}], '
+                   'add "dependencies" instructions only for missing packages. '
+                   'give only the fixed files, others are already correct')
+        return self._send_request(prompt, "repair")
+
+    def _use_template(self, prompt: str, template: List[Dict], request: Optional[str], kind: str) -> List[Dict]:
+        """Answer ``prompt`` with library instructions and, given a ``request``, ask Gemini only for the changes it needs.
+
+        The template is recorded in the chat history like a Gemini answer, so later requests
+        see it as context. In compact context mode, where the chat is not sent, the request for
+        the changes carries the template itself.
+        """
+        self.chat.append({"role": "user", "parts": [{"text": prompt}]})
+        self._remember(template)
+        if not request:
+            return template
+        if self.context_mode == "compact":
+            # Only the latest prompt is sent, so it has to carry the template itself
+            source = f"{prompt.strip()}\nThese instructions come from a template:\n{json.dumps(template)}\n"
+        else:
+            source = "The instructions above come from a template. "
+        delta = self._send_request(
+            f"{source}Adjust them to this request: {request}\n"
+            "Reply with a JSON array of only the instructions to add or change, giving the full content of every "
+            "changed file, or [] if nothing needs to change.", kind)
+        return template + delta
 
     def _build_authentication_prompt(self, type: str, custom_description: str = None) -> str:
         return f"""
@@ -79,56 +204,382 @@ class GeminiClient:
 
     def _load_system_instructions(self):
         try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            file_path = os.path.join(script_dir, "system_instructions.txt")
-            with open(file_path, "r") as f:
-                content = f.read()
-                content = content.replace("{project_name}", self.project_name)
-                content = content.replace("{project_type}", self.options.get("type"))
-                self._system_instruction = content
+            content = _read_system_instructions()
+            content = content.replace("{project_name}", self.project_name)
+            content = content.replace("{project_type}", self.options.get("type"))
+            self._system_instruction = content
         except FileNotFoundError:
             console.print("[red]System instructions file not found. Please generate them using the 'generate_system_instructions.py' script and upload the resulting JSON file to the project directory.[/red]")
             raise
 
-    def _send_request(self, prompt):
+    def _send_request(self, prompt, kind: str = "app"):
         self.chat.append({"role": "user", "parts": [{"text": prompt}]})
+        contents = self._request_contents()
+        route = self.router.route_key(kind)
+        cache_key = self.cache.key(route, self._system_instruction, contents) if self.cache else None
+        if cache_key:
+            content = self.cache.get(cache_key)
+            if content is not None:
+                self._remember(content)
+                return content
         try:
-            content = None
-            while True:
-                headers = {"Content-Type": "application/json"}
-                data = {"system_instruction": {"parts": {"text": self._system_instruction}},
-                        "contents": self.chat}
-                url = (f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}"
-                       f":generateContent?key={self.api_key}")
-                response = requests.post(url, json=data, headers=headers)
-                if response.status_code != 200:
+            content = self._generate_routed(kind, self._system_instruction, contents)
+            if cache_key:
+                self.cache.set(cache_key, content)
+            self._remember(content)
+            return content
+
+        except Exception as e:
+            console.print(f"[red]Error getting instructions from Gemini API: {str(e)}[/red]")
+            raise
+
+    def _request_contents(self) -> List[Dict]:
+        """Return the contents to send for the latest prompt.
+
+        In ``full`` context mode that is the whole chat. In ``compact`` mode it is the latest
+        prompt prefixed with the project manifest, so request size no longer grows with
+        every file generated so far.
+        """
+        if self.context_mode != "compact":
+            return self.chat
+        prompt = self.chat[-1]["parts"][0]["text"]
+        preamble = self.manifest.render()
+        if preamble:
+            prompt = f"{preamble}\n\n{prompt}"
+        return [{"role": "user", "parts": [{"text": prompt}]}]
+
+    def _remember(self, content):
+        self.chat.append({"role": "model", "parts": [{"text": json.dumps(content)}]})
+        self.manifest.record(content)
+
+    def _request_body(self, model: str, system_instruction: str, contents: List[Dict]) -> Dict:
+        cached_content = self._cached_content(model, system_instruction) if self.context_cache else None
+        if cached_content:
+            return {"cachedContent": cached_content, "contents": contents}
+        return {"system_instruction": {"parts": {"text": system_instruction}},
+                "contents": contents}
+
+    def _cached_content(self, model: str, system_instruction: str) -> Optional[str]:
+        """Return the name of a Gemini context cache holding the system instruction, creating it once per model.
+
+        Gemini refuses to cache prefixes below its minimum token count; in that case, or on
+        any other error, requests fall back to sending the system instruction inline.
+        """
+        with self._cached_contents_lock:
+            if model not in self._cached_contents:
+                data = {"model": f"models/{model}",
+                        "systemInstruction": {"parts": [{"text": system_instruction}]},
+                        "ttl": "3600s"}
+                try:
+                    response = self._post(f"{API_ROOT}/cachedContents", params={"key": self.api_key},
+                                          json=data, timeout=self.timeout)
+                    response.raise_for_status()
+                    self._cached_contents[model] = response.json()["name"]
+                except (requests.RequestException, ValueError, KeyError) as e:
+                    console.print(f"[yellow]Context caching unavailable for {model}: {e}[/yellow]")
+                    self._cached_contents[model] = None
+            return self._cached_contents[model]
+
+    def _create_session(self) -> requests.Session:
+        """Create a keep-alive session shared by every request of this client and its forks."""
+        pool_size = max(10, self.options.get("workers") or 1)
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+        session.headers.update({"Content-Type": "application/json"})
+        return session
+
+    def _post(self, url: str, **kwargs) -> requests.Response:
+        if _rate_limiter is not None:
+            _rate_limiter.acquire()
+        return self.session.post(url, **kwargs)
+
+    def _generate_routed(self, kind: str, system_instruction: str, contents: List[Dict]):
+        """Generate with the model the router ranks fastest for ``kind``, hedging if enabled."""
+        models = self.router.candidates(kind)
+        if self.hedge_after is None or len(models) < 2:
+            return self._generate(models[0], system_instruction, contents)
+        return self._generate_hedged(models[:2], system_instruction, contents)
+
+    def _generate_hedged(self, models: List[str], system_instruction: str, contents: List[Dict]):
+        """Send the request to the first model and, if it has not answered after ``hedge_after``
+        seconds or has failed, to the second one too. The first response that parses wins.
+
+        Requests cannot be cancelled, so the slower one finishes in the background; its
+        latency still feeds the router.
+        """
+        executor = ThreadPoolExecutor(max_workers=len(models))
+        futures = {executor.submit(self._generate, models[0], system_instruction, contents): models[0]}
+        try:
+            done, _ = wait(futures, timeout=self.hedge_after)
+            if not done or next(iter(done)).exception() is not None:
+                console.print(f"[yellow]{models[0]} is slow, also asking {models[1]}...[/yellow]")
+                futures[executor.submit(self._generate, models[1], system_instruction, contents)] = models[1]
+                with self._calls_lock:
+                    self.hedges["sent"] += 1
+            error = None
+            for future in as_completed(futures):
+                try:
+                    content = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if futures[future] != models[0]:
+                    with self._calls_lock:
+                        self.hedges["won"] += 1
+                return content
+            raise error
+        finally:
+            executor.shutdown(wait=False)
+
+    def _generate(self, model: str, system_instruction: str, contents: List[Dict], continuation: int = 0):
+        """Call generateContent and return the parsed response, retrying with jittered backoff.
+
+        RECITATION answers, bodies that are not JSON, responses without an instruction array,
+        timeouts, connection errors and 429/5xx statuses are retried up to ``max_retries``
+        times, waiting at most ``MAX_RETRY_DELAY`` even if Retry-After asks for more; other
+        errors are raised at once. A response cut off mid-array is completed by a
+        continuation request.
+        """
+        data = self._request_body(model, system_instruction, contents)
+        url = f"{API_URL}/{model}:generateContent"
+        started = time.perf_counter()
+        attempt = 0
+        recitations = 0
+        while True:
+            attempt += 1
+            retry_after = None
+            try:
+                response = self._post(url, params={"key": self.api_key}, json=data, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                reason = type(e).__name__
+            else:
+                if response.status_code == 200:
+                    try:
+                        body = response.json()
+                    except ValueError:
+                        # E.g. an HTML error page from a proxy
+                        body = None
+                    if body is None:
+                        reason = "response is not JSON"
+                    elif body.get("candidates", [{}])[0].get("finishReason") == "RECITATION":
+                        reason = "RECITATION"
+                        recitations += 1
+                    else:
+                        text = self._response_text(body)
+                        try:
+                            parsed = self._parse_response(text)
+                        except ValueError:
+                            reason = "invalid response format"
+                        else:
+                            self._record_call(model, started, attempt, "ok", body.get("usageMetadata"), recitations)
+                            if parsed.truncated:
+                                return self._continue(model, system_instruction, contents, text,
+                                                      parsed.instructions, continuation)
+                            return parsed.instructions
+                elif response.status_code in RETRY_STATUS_CODES:
+                    reason = f"HTTP {response.status_code}"
+                    retry_after = self._retry_after(response)
+                else:
+                    self._record_call(model, started, attempt, f"HTTP {response.status_code}",
+                                      recitations=recitations)
                     console.print(
                         f"[red]Error generating instructions from Gemini API: {response.status_code} - {response.text}[/red]")
                     raise Exception(f"Failed to generate instructions from Gemini API")
-                data = response.json()
-                if not data.get("candidates", [{}])[0].get("finishReason") == "RECITATION":
-                    try:
-                        content = self._parse_response(data)
+
+            if attempt > self.max_retries:
+                self._record_call(model, started, attempt, reason, recitations=recitations)
+                raise Exception(f"Failed to generate instructions from Gemini API after {attempt} attempts: {reason}")
+            delay = self._backoff_delay(attempt, retry_after)
+            console.print(f"[yellow]Retrying in {delay:.1f}s ({reason})...[/yellow]")
+            time.sleep(delay)
+
+    def _stream_request(self, prompt, kind: str = "app"):
+        """Send a prompt to streamGenerateContent and yield each instruction as soon as it is complete.
+
+        Like ``_generate``, RECITATION answers, responses without an instruction array,
+        timeouts, connection errors and 429/5xx statuses are retried up to ``max_retries``
+        times, but only while nothing has been yielded yet; once instructions have been handed
+        out, a failure raises instead of silently starting over. A stream that ends mid-array
+        is completed by a continuation request. Streams are never
+        hedged: instructions are applied as they arrive, so only one model can produce them.
+        """
+        self.chat.append({"role": "user", "parts": [{"text": prompt}]})
+        contents = self._request_contents()
+        model = self.router.choose(kind)
+        route = self.router.route_key(kind)
+        cache_key = self.cache.key(route, self._system_instruction, contents) if self.cache else None
+        if cache_key:
+            content = self.cache.get(cache_key)
+            if content is not None:
+                self._remember(content)
+                yield from content
+                return
+
+        data = self._request_body(model, self._system_instruction, contents)
+        usage = None
+        url = f"{API_URL}/{model}:streamGenerateContent"
+        started = time.perf_counter()
+        content = []
+        attempt = 0
+        recitations = 0
+        try:
+            while True:
+                attempt += 1
+                parser = InstructionStreamParser()
+                text = []
+                reason = retry_after = None
+                try:
+                    with self._post(url, params={"key": self.api_key, "alt": "sse"}, json=data,
+                                    timeout=self.timeout, stream=True) as response:
+                        if response.status_code in RETRY_STATUS_CODES:
+                            reason = f"HTTP {response.status_code}"
+                            retry_after = self._retry_after(response)
+                        elif response.status_code != 200:
+                            self._record_call(model, started, attempt, f"HTTP {response.status_code}",
+                                              recitations=recitations)
+                            console.print(
+                                f"[red]Error generating instructions from Gemini API: {response.status_code} - {response.text}[/red]")
+                            raise Exception("Failed to generate instructions from Gemini API")
+                        else:
+                            for line in response.iter_lines(decode_unicode=True):
+                                if not line or not line.startswith("data:"):
+                                    continue
+                                chunk = json.loads(line[len("data:"):])
+                                usage = chunk.get("usageMetadata", usage)
+                                candidate = chunk.get("candidates", [{}])[0]
+                                if candidate.get("finishReason") == "RECITATION":
+                                    reason = "RECITATION"
+                                    recitations += 1
+                                    break
+                                for part in candidate.get("content", {}).get("parts", []):
+                                    text.append(part.get("text", ""))
+                                    for instruction in parser.feed(part.get("text", "")):
+                                        content.append(instruction)
+                                        yield instruction
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    reason = type(e).__name__
+                if reason is None:
+                    for instruction in parser.finish():
+                        content.append(instruction)
+                        yield instruction
+                    for error in parser.errors:
+                        console.print(f"[yellow]Skipping invalid instruction: {error}[/yellow]")
+                    if parser.started:
+                        # Complete, or completed by a continuation below
                         break
-                    except:
-                        continue
-                print("[retrying...]")
-            self.chat.append({"role": "model", "parts": [{"text": json.dumps(content)}]})
-            return content
+                    reason = "invalid response format"
+
+                if content:
+                    self._record_call(model, started, attempt, reason, usage, recitations)
+                    raise Exception(f"Stream failed after {len(content)} instructions were applied: {reason}")
+                if attempt > self.max_retries:
+                    self._record_call(model, started, attempt, reason, usage, recitations)
+                    raise Exception(f"Failed to generate instructions from Gemini API after {attempt} attempts: {reason}")
+                delay = self._backoff_delay(attempt, retry_after)
+                console.print(f"[yellow]Retrying in {delay:.1f}s ({reason})...[/yellow]")
+                time.sleep(delay)
+
+            self._record_call(model, started, attempt, "ok", usage, recitations)
+            if not parser.finished:
+                rest = self._continue(model, self._system_instruction, contents, "".join(text), list(content))
+                for instruction in rest[len(content):]:
+                    content.append(instruction)
+                    yield instruction
+            if cache_key:
+                self.cache.set(cache_key, content)
+            self._remember(content)
 
         except Exception as e:
-            console.print(f"[red]Error getting instructions from Gemini API: {str(e)}[/red]")
+            console.print(f"[red]Error streaming instructions from Gemini API: {str(e)}[/red]")
             raise
 
-    def _parse_response(self, response: dict) -> dict:
+    @staticmethod
+    def _backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(MAX_RETRY_DELAY, retry_after)
+        return min(MAX_RETRY_DELAY, 2.0 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
         try:
-            response = response.get("candidates", [{}])[0]
-            response = response.get("content", {}).get("parts", [{}])[0]
-            content = response.get("text").replace("```json", "").replace("```", "")
-            content = json.loads(content)
-        except Exception as e:
-            pprint(response)
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _record_call(self, model: str, started: float, attempts: int, status: str, usage: Optional[Dict] = None,
+                     recitations: int = 0):
+        usage = usage or {}
+        call = {"model": model, "latency": time.perf_counter() - started,
+                "attempts": attempts, "status": status, "recitations": recitations,
+                "prompt_tokens": usage.get("promptTokenCount", 0),
+                "cached_tokens": usage.get("cachedContentTokenCount", 0),
+                "response_tokens": usage.get("candidatesTokenCount", 0)}
+        with self._calls_lock:
+            self.calls.append(call)
+        self.router.record(model, call["latency"], status == "ok")
+        tracer.record("gemini", "api", started, call["latency"], **{key: value for key, value in call.items()
+                                                                      if key != "latency"})
+
+    def print_stats(self):
+        """Print request counts, retries, latencies and token counts of the Gemini calls made so far."""
+        if not self.calls:
+            return
+        table = Table(title="Gemini requests")
+        for column in ("Model", "Status", "Attempts", "Latency", "Prompt tokens", "Cached tokens", "Response tokens"):
+            table.add_column(column, justify="left" if column in ("Model", "Status") else "right")
+        for call in self.calls:
+            table.add_row(call["model"], call["status"], str(call["attempts"]), f"{call['latency']:.1f}s",
+                          str(call["prompt_tokens"]), str(call["cached_tokens"]), str(call["response_tokens"]))
+        console.print(table)
+        retries = sum(call["attempts"] - 1 for call in self.calls)
+        latency = sum(call["latency"] for call in self.calls)
+        slowest = max(call["latency"] for call in self.calls)
+        tokens = sum(call["prompt_tokens"] for call in self.calls)
+        console.print(f"[blue]Gemini: {len(self.calls)} requests, {retries} retries, "
+                      f"{latency:.1f}s total, {slowest:.1f}s slowest, {tokens} prompt tokens[/blue]")
+        if self.hedges["sent"]:
+            console.print(f"[blue]Hedged {self.hedges['sent']} requests, the second model won "
+                          f"{self.hedges['won']}[/blue]")
+
+    def _continue(self, model: str, system_instruction: str, contents: List[Dict], text: str,
+                  received: List[Dict], continuation: int = 0) -> List[Dict]:
+        """Ask the model for the rest of a response that was cut off and return all its instructions.
+
+        Only the missing instructions are requested; the complete ones before the cut are kept.
+        """
+        if continuation >= self.max_continuations:
+            raise Exception(f"Response from Gemini API still truncated after {continuation} continuations")
+        last = f", the last one being {describe_instruction(received[-1])}" if received else ""
+        prompt = (f"Your previous response was cut off after {len(received)} complete instructions{last}. "
+                  "Reply with a JSON array of only the remaining instructions, starting with the one that was "
+                  "cut off. Do not repeat the complete instructions.")
+        console.print(f"[yellow]Response truncated after {len(received)} instructions, "
+                      f"requesting the rest...[/yellow]")
+        contents = list(contents) + [{"role": "model", "parts": [{"text": text}]},
+                                     {"role": "user", "parts": [{"text": prompt}]}]
+        return received + self._generate(model, system_instruction, contents, continuation + 1)
+
+    @staticmethod
+    def _response_text(response: Dict) -> str:
+        candidate = (response.get("candidates") or [{}])[0]
+        return "".join(part.get("text", "") for part in candidate.get("content", {}).get("parts", []))
+
+    def _parse_response(self, text: str) -> ParsedResponse:
+        """Parse the instructions out of a response, skipping those that fail validation.
+
+        Raises ValueError if the text holds no instruction array at all.
+        """
+        parsed = parse_instructions(text)
+        if not parsed.found:
             console.print("[red]Error parsing response from Gemini API: Invalid response format[/red]")
-            raise
-        pprint(content)
-        return content
+            raise ValueError("No instruction array in response")
+        for error in parsed.errors:
+            console.print(f"[yellow]Skipping invalid instruction: {error}[/yellow]")
+        return parsed
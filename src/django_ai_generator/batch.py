@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import yaml
+from rich.console import Console
+
+from . import api_client, dependencies
+from .generator import ProjectGenerator
+
+console = Console()
+
+
+def load_spec(path: str) -> List[Dict]:
+    """Load the projects of a batch spec file.
+
+    The file is either a list of projects or a mapping with ``projects`` and optional
+    ``defaults`` applied to every project. Each project is a ProjectGenerator options dict
+    with an additional ``name``.
+    """
+    with open(path) as f:
+        spec = yaml.safe_load(f)
+    defaults = {}
+    if isinstance(spec, dict):
+        defaults = spec.get("defaults") or {}
+        spec = spec.get("projects")
+    if not isinstance(spec, list):
+        raise ValueError(f"{path} must contain a list of projects")
+
+    projects = []
+    for entry in spec:
+        project = dict(defaults, **entry)
+        if not project.get("name"):
+            raise ValueError(f"Project without a name in {path}: {entry}")
+        projects.append(project)
+    names = [project["name"] for project in projects]
+    duplicates = {name for name in names if names.count(name) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate project names in {path}: {', '.join(sorted(duplicates))}")
+    return projects
+
+
+def _init_worker(rate_limiter: Optional[api_client.RateLimiter], pip_lock):
+    api_client.set_rate_limiter(rate_limiter)
+    dependencies.set_pip_lock(pip_lock)
+
+
+def _generate_project(project: Dict, output_dir: str) -> bool:
+    options = dict(project)
+    name = options.pop("name")
+    options.setdefault("output_dir", output_dir)
+    return ProjectGenerator(name, options).generate()
+
+
+def run_batch(projects: List[Dict], output_dir: str = ".", processes: Optional[int] = None,
+              requests_per_minute: Optional[float] = None) -> Dict[str, bool]:
+    """Generate many projects in a process pool and return whether each one succeeded.
+
+    All workers share one API rate limit and the on-disk response and wheel caches; pip
+    runs are serialized, as they install into the same interpreter. Every project is
+    written to its own directory under ``output_dir``.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    context = multiprocessing.get_context("spawn")
+    rate_limiter = api_client.RateLimiter(requests_per_minute, context) if requests_per_minute else None
+    results = {}
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context,
+                             initializer=_init_worker, initargs=(rate_limiter, context.Lock())) as executor:
+        futures = {executor.submit(_generate_project, project, output_dir): project["name"] for project in projects}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                console.print(f"[red]{name}: {e}[/red]")
+                results[name] = False
+            console.print(f"[green]✓[/green] {name}" if results[name] else f"[red]✗[/red] {name}")
+    return results
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, List, Dict, Optional
+
+
+def default_cache_dir() -> Path:
+    """Return the directory used for cached Gemini responses."""
+    if os.getenv("DJANGO_GEN_CACHE_DIR"):
+        return Path(os.getenv("DJANGO_GEN_CACHE_DIR"))
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "django-ai-generator"
+
+
+class ResponseCache:
+    """Content-addressed on-disk cache of parsed Gemini responses.
+
+    Entries are keyed by a hash of the model, the system instruction and the full chat
+    history, expire after ``ttl`` seconds and are evicted least recently used first once
+    the cache grows beyond ``max_size`` bytes.
+    """
+
+    def __init__(self, directory: Optional[str] = None, ttl: int = 7 * 24 * 3600,
+                 max_size: int = 200 * 1024 * 1024):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.ttl = ttl
+        self.max_size = max_size
+
+    def key(self, model: str, system_instruction: str, contents: List[Dict]) -> str:
+        payload = json.dumps({"model": model, "system_instruction": system_instruction, "contents": contents},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                return None
+            content = json.loads(path.read_text(encoding="utf-8"))
+            # Reading an entry counts as a use, so bump its mtime for LRU eviction
+            os.utime(path)
+            return content
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def set(self, key: str, content: Any):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(content, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._evict()
+
+    def clear(self) -> int:
+        """Remove every cached response and return how many were removed."""
+        removed = 0
+        for path in self._entries():
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _entries(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        return list(self.directory.glob("*/*.json"))
+
+    def _evict(self):
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_size and now - mtime <= self.ttl:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
@@ -1,16 +1,30 @@
+import atexit
+import functools
+import os
+from typing import Dict
+
+# Imported first so startup can be timed from here
+from django_ai_generator import startup
+
 import click
-from rich.console import Console
-from InquirerPy import prompt
-from InquirerPy.base.control import Choice
-from rich.prompt import Confirm
+from click.core import ParameterSource
+
+from django_ai_generator.routing import parse_model_routes
+
+# Everything else (rich, InquirerPy, requests, the generator) is imported where it is first
+# needed, so --help, --version and shell completion stay fast.
 
-from django_ai_generator.generator import ProjectGenerator
 
-console = Console()
+@functools.lru_cache(maxsize=None)
+def get_console():
+    from rich.console import Console
+
+    return Console()
 
 
 def validate_project_name(name: str) -> bool:
     """Validate Django project name"""
+    console = get_console()
     if not name.isidentifier():
         console.print("[red]Project name must be a valid Python identifier[/red]")
         return False
@@ -20,9 +34,213 @@ def validate_project_name(name: str) -> bool:
     return True
 
 
-@click.command()
-def main():
+def edit_answers(stored: Dict) -> Dict:
+    """Offer the stored answers of a project for editing, for ``--update``.
+
+    Jobs are only removed after a confirmation, since that deletes their files and
+    reverts their settings. Pressing Enter keeps an answer, so its app is not regenerated.
+    """
+    from InquirerPy import prompt
+    from rich.prompt import Confirm
+
+    answers = dict(stored, apps=list(stored["apps"]))
+    removable = (["authentication"] if stored.get("authentication") else []) + [app["name"] for app in stored["apps"]]
+    remove = prompt([
+        {
+            "type": "checkbox",
+            "name": "remove",
+            "message": "Select apps to remove (Enter to keep all):",
+            "choices": removable,
+        }
+    ])["remove"] if removable else []
+    if remove and Confirm.ask(f"Delete the files and settings generated for {', '.join(remove)}?", default=False):
+        if "authentication" in remove:
+            answers.update(authentication=False, auth_type=None, auth_prompt=None)
+        answers["apps"] = [app for app in answers["apps"] if app["name"] not in remove]
+
+    if answers.get("authentication"):
+        description = prompt([
+            {
+                "type": "input",
+                "name": "description",
+                "message": "Describe authentication:",
+                "default": stored.get("auth_prompt") or "",
+            }
+        ])["description"]
+        if description or stored.get("auth_prompt") is not None:
+            answers["auth_prompt"] = description
+    for index, app in enumerate(answers["apps"]):
+        description = prompt([
+            {
+                "type": "input",
+                "name": "description",
+                "message": f"Describe {app['name']}:",
+                "default": app["description"],
+            }
+        ])["description"]
+        answers["apps"][index] = dict(app, description=description)
+
+    while Confirm.ask("Add another app?", default=False):
+        app_name = prompt([{"type": "input", "name": "name", "message": "App name:"}])["name"]
+        app_description = prompt([
+            {
+                "type": "input",
+                "name": "description",
+                "message": "Describe this app:",
+            }
+        ])["description"]
+        answers["apps"].append({"name": app_name, "description": app_description})
+    return answers
+
+
+def _print_version(ctx, param, value):
+    if not value or ctx.resilient_parsing:
+        return
+    from importlib import metadata
+
+    try:
+        version = metadata.version("django-ai-generator")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    click.echo(f"django-gen {version}")
+    ctx.exit()
+
+
+def _profile_startup(ctx, param, value):
+    if not value or ctx.resilient_parsing:
+        return
+    startup.mark("options parsed")
+    profiler = startup.ImportProfiler()
+    profiler.start()
+    atexit.register(profiler.report)
+
+
+# Generation options set by a negated flag
+_NEGATED_FLAGS = {"library": "no_library", "validate": "no_validate", "cache": "no_cache"}
+
+
+def _given_flags(ctx, flags: Dict) -> Dict:
+    """Return the generation options among ``flags`` that were passed, rather than left at their defaults."""
+    return {key: value for key, value in flags.items()
+            if ctx.get_parameter_source(_NEGATED_FLAGS.get(key, key)) not in (None, ParameterSource.DEFAULT)}
+
+
+def _stored_options(options: Dict) -> Dict:
+    """Options of an earlier run, without those that only applied to that invocation."""
+    return {key: value for key, value in options.items() if key not in ("dry_run", "plan_out")}
+
+
+def _parse_models(ctx, param, value):
+    try:
+        return parse_model_routes(value) or None
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+@click.group(invoke_without_command=True)
+@click.option("--version", is_flag=True, expose_value=False, is_eager=True, callback=_print_version,
+              help="Show the version and exit.")
+@click.option("--profile-startup", is_flag=True, expose_value=False, is_eager=True, callback=_profile_startup,
+              help="Print startup milestones and the slowest imports on exit; pass it first.")
+@click.option("--workers", default=1, show_default=True, type=click.IntRange(min=1),
+              help="Number of apps to request from Gemini at the same time.")
+@click.option("--stream", is_flag=True, help="Apply instructions while Gemini is still generating them.")
+@click.option("--context", type=click.Choice(["full", "compact"]), default="full", show_default=True,
+              help="Send the whole chat history, or a compact project manifest, with each request.")
+@click.option("--context-cache", is_flag=True, help="Cache the system instruction with Gemini context caching.")
+@click.option("--model", "models", multiple=True, callback=_parse_models, metavar="KIND=MODEL[,MODEL...]",
+              help="Candidate models for auth, app, refactor, repair or project requests; the fastest one is used.")
+@click.option("--hedge-after", type=click.FloatRange(min=0),
+              help="Seconds after which a request is also sent to the next candidate model.")
+@click.option("--dry-run", is_flag=True, help="Print the compiled plan instead of creating the project.")
+@click.option("--plan-out", type=click.Path(dir_okay=False), help="Save the compiled plan as JSON.")
+@click.option("--replay", type=click.Path(exists=True, dir_okay=False),
+              help="Create the project from a saved plan without calling Gemini.")
+@click.option("--resume", type=click.Path(exists=True, file_okay=False),
+              help="Continue an interrupted run in this project directory from its journal.")
+@click.option("--update", type=click.Path(exists=True, file_okay=False),
+              help="Edit the stored answers of this project and regenerate only the apps whose answers changed.")
+@click.option("--trace", type=click.Path(dir_okay=False),
+              help="Write a Chrome trace of API calls, instructions, pip runs and commands, and print a summary.")
+@click.option("--no-library", is_flag=True,
+              help="Always ask Gemini instead of starting from the built-in library of known setups.")
+@click.option("--no-validate", is_flag=True,
+              help="Skip the static checks of generated code, and the repair request for failing files.")
+@click.option("--no-cache", is_flag=True, help="Always call Gemini instead of reusing cached responses.")
+@click.option("--clear-cache", is_flag=True, help="Remove all cached Gemini responses before generating.")
+@click.pass_context
+def main(ctx, workers, stream, context, context_cache, models, hedge_after, dry_run, plan_out, replay, resume, update,
+         trace, no_library, no_validate, no_cache, clear_cache):
     """Django project generator with AI assistance"""
+    console = get_console()
+
+    if clear_cache:
+        from django_ai_generator.cache import ResponseCache
+
+        removed = ResponseCache().clear()
+        console.print(f"[blue]Removed {removed} cached responses[/blue]")
+
+    if ctx.invoked_subcommand is not None:
+        # Generation flags act as defaults for every project of the subcommand
+        ctx.obj = dict(workers=workers, stream=stream, context=context, context_cache=context_cache,
+                       models=models, hedge_after=hedge_after, library=not no_library, validate=not no_validate,
+                       cache=not no_cache)
+        return
+
+    flags = dict(workers=workers, stream=stream, context=context, context_cache=context_cache, models=models,
+                 hedge_after=hedge_after, dry_run=dry_run, plan_out=plan_out, trace=trace, library=not no_library,
+                 validate=not no_validate, cache=not no_cache)
+
+    if resume:
+        from django_ai_generator.generator import ProjectGenerator
+        from django_ai_generator.journal import JOURNAL_FILE, Journal
+
+        journal = Journal.load(os.path.join(resume, JOURNAL_FILE))
+        options = dict(_stored_options(journal.options), **_given_flags(ctx, flags),
+                       output_dir=os.path.dirname(os.path.abspath(resume)), resume=True)
+        with console.status("Resuming project..."):
+            succeeded = ProjectGenerator(journal.project, options).generate()
+        if not succeeded:
+            raise click.exceptions.Exit(1)
+        console.print("[green]✓[/green] Project generated successfully!")
+        return
+
+    if replay:
+        from django_ai_generator.generator import ProjectGenerator
+        from django_ai_generator.plan import Plan
+
+        plan = Plan.load(replay)
+        with console.status("Replaying plan..."):
+            succeeded = ProjectGenerator(plan.project, dict(_stored_options(plan.options),
+                                                            **_given_flags(ctx, flags))).replay(plan)
+        if not succeeded:
+            raise click.exceptions.Exit(1)
+        console.print("[green]✓[/green] Project generated successfully!")
+        return
+
+    if update:
+        from django_ai_generator.generator import ProjectGenerator
+        from django_ai_generator.manifest import MANIFEST_FILE, GenerationManifest
+
+        project_dir = os.path.abspath(update)
+        try:
+            stored = GenerationManifest.load(os.path.join(project_dir, MANIFEST_FILE)).options()
+        except (OSError, ValueError) as e:
+            console.print(f"[red]Cannot update {update}: {e}[/red]")
+            raise click.exceptions.Exit(1)
+        options = dict(flags, **edit_answers(stored), update=True, output_dir=os.path.dirname(project_dir))
+        with console.status("Updating project..."):
+            succeeded = ProjectGenerator(os.path.basename(project_dir), options).generate()
+        if not succeeded:
+            raise click.exceptions.Exit(1)
+        console.print("[green]✓[/green] Project updated successfully!")
+        return
+
+    from InquirerPy import prompt
+    from InquirerPy.base.control import Choice
+    from rich.prompt import Confirm
+
+    from django_ai_generator.generator import ProjectGenerator
 
     # Project name prompt with validation
     while True:
@@ -37,7 +255,7 @@ def main():
             break
         console.print("[yellow]Please choose a different project name[/yellow]")
 
-    options = dict()
+    options = dict(flags)
 
     # Framework selection
     project_type = prompt([
@@ -142,7 +360,35 @@ def main():
 
     # Generate project
     with console.status("Generating project..."):
-        generator.generate()
+        succeeded = generator.generate()
+    if not succeeded:
+        raise click.exceptions.Exit(1)
 
     console.print("[green]✓[/green] Project generated successfully!")
 
+
+@main.command()
+@click.argument("spec", type=click.Path(exists=True, dir_okay=False))
+@click.option("--output-dir", default=".", show_default=True, type=click.Path(file_okay=False),
+              help="Directory in which every project gets its own folder.")
+@click.option("--processes", type=click.IntRange(min=1), help="Number of projects generated at the same time.")
+@click.option("--requests-per-minute", type=click.FloatRange(min=0, min_open=True),
+              help="Gemini request rate limit shared by all projects.")
+@click.pass_obj
+def batch(defaults, spec, output_dir, processes, requests_per_minute):
+    """Generate every project listed in a YAML spec file"""
+    from django_ai_generator.batch import load_spec, run_batch
+
+    projects = [dict(defaults, **project) for project in load_spec(spec)]
+    if not all(validate_project_name(project["name"]) for project in projects):
+        raise click.exceptions.Exit(1)
+    results = run_batch(projects, output_dir, processes, requests_per_minute)
+    failed = [name for name, succeeded in results.items() if not succeeded]
+    console = get_console()
+    if failed:
+        console.print(f"[red]Failed projects: {', '.join(failed)}[/red]")
+        raise click.exceptions.Exit(1)
+    console.print(f"[green]✓[/green] Generated {len(results)} projects successfully!")
+
+
+startup.mark("cli imported")
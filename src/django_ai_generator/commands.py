@@ -0,0 +1,151 @@
+import json
+import os
+import shlex
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Characters that need a shell to mean what they say
+_SHELL_CHARACTERS = set("|&;<>()$`*?[]{}~!#\n")
+# manage.py commands that talk to the terminal, so they cannot run in the worker
+INTERACTIVE_COMMANDS = {"createsuperuser", "changepassword", "shell", "dbshell", "runserver", "testserver"}
+_PACKAGE_PARENT = str(Path(__file__).resolve().parent.parent)
+
+
+class CommandResult:
+    def __init__(self, command: str, returncode: int, output: str, in_process: bool):
+        self.command = command
+        self.returncode = returncode
+        self.output = output
+        self.in_process = in_process
+
+
+def manage_py_args(command: str) -> Optional[List[str]]:
+    """Return the arguments of a plain ``python manage.py ...`` command, or None for anything else."""
+    if any(char in _SHELL_CHARACTERS for char in command):
+        return None
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return None
+    if argv and os.path.basename(argv[0]).startswith("python"):
+        argv = argv[1:]
+    if not argv or argv[0] not in ("manage.py", "./manage.py") or len(argv) < 2:
+        return None
+    if argv[1] in INTERACTIVE_COMMANDS:
+        return None
+    return argv[1:]
+
+
+class CommandExecutor:
+    """Runs the commands of instructions in the project directory, capturing their output.
+
+    Consecutive ``manage.py`` commands share one long-lived worker process that runs them
+    through Django's ``ManagementUtility``, so Django is imported and set up once per run
+    of commands instead of once per command. The worker is restarted when the project
+    changed since it started (``revision``), because Django cannot reload settings or
+    models. Other commands run as subprocesses, without a shell unless they need one.
+    """
+
+    def __init__(self, project_dir: str, settings_module: str):
+        self.project_dir = project_dir
+        self.settings_module = settings_module
+        self._worker: Optional[subprocess.Popen] = None
+        self._worker_revision = None
+
+    def run(self, command: str, revision: int = 0) -> CommandResult:
+        args = manage_py_args(command)
+        response = self._run_in_worker(args, revision) if args is not None else None
+        in_process = response is not None
+        if response is None:
+            # The command may change anything, so the worker must not outlive it
+            self.close()
+            response = self._run_subprocess(command)
+        returncode, output = response
+        return CommandResult(command, returncode, output, in_process)
+
+    def close(self):
+        """Stop the worker process, if one is running."""
+        if self._worker is None:
+            return
+        try:
+            self._worker.stdin.close()
+            self._worker.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            self._worker.kill()
+            self._worker.wait()
+        self._worker = None
+
+    def _run_subprocess(self, command: str) -> Tuple[int, str]:
+        shell = any(char in _SHELL_CHARACTERS for char in command)
+        try:
+            args = command if shell else shlex.split(command)
+        except ValueError:
+            args, shell = command, True
+        try:
+            process = subprocess.run(args, shell=shell, cwd=self.project_dir, stdout=subprocess.PIPE,
+                                     stderr=subprocess.STDOUT, text=True)
+        except OSError as e:
+            return 127, str(e)
+        return process.returncode, process.stdout
+
+    def _run_in_worker(self, args: List[str], revision: int) -> Optional[Tuple[int, str]]:
+        """Run a command in the worker; None if the worker died, e.g. because Django cannot be imported."""
+        if self._worker is not None and (self._worker_revision != revision or self._worker.poll() is not None):
+            self.close()
+        if self._worker is None:
+            self._worker = self._start_worker()
+            self._worker_revision = revision
+        try:
+            self._worker.stdin.write(json.dumps({"args": args}) + "\n")
+            self._worker.stdin.flush()
+            line = self._worker.stdout.readline()
+        except OSError:
+            line = ""
+        if not line:
+            self.close()
+            return None
+        response = json.loads(line)
+        return response["returncode"], response["output"]
+
+    def _start_worker(self) -> subprocess.Popen:
+        env = dict(os.environ)
+        env.setdefault("DJANGO_SETTINGS_MODULE", self.settings_module)
+        code = (f"import sys; sys.path.insert(1, {_PACKAGE_PARENT!r}); "
+                "from django_ai_generator.commands import worker_main; worker_main()")
+        return subprocess.Popen([sys.executable, "-c", code], cwd=self.project_dir, env=env, text=True,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+
+def worker_main():
+    """Serve ``manage.py`` commands read as JSON lines on stdin, answering each on stdout.
+
+    Command output is captured per command. Anything else written to the standard
+    streams goes to stderr, so stdout only carries responses, and commands read from
+    /dev/null instead of the request pipe.
+    """
+    import io
+    import traceback
+    from contextlib import redirect_stderr, redirect_stdout
+
+    from django.core.management import ManagementUtility
+
+    responses = os.fdopen(os.dup(1), "w")
+    os.dup2(2, 1)
+    requests = sys.stdin
+    sys.stdin = open(os.devnull)
+    for line in requests:
+        args = json.loads(line)["args"]
+        output = io.StringIO()
+        with redirect_stdout(output), redirect_stderr(output):
+            try:
+                ManagementUtility(["manage.py", *args]).execute()
+                returncode = 0
+            except SystemExit as e:
+                returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except BaseException:
+                traceback.print_exc()
+                returncode = 1
+        responses.write(json.dumps({"returncode": returncode, "output": output.getvalue()}) + "\n")
+        responses.flush()
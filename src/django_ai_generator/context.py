@@ -0,0 +1,86 @@
+import ast
+import copy
+from typing import Dict, List
+
+
+class ProjectManifest:
+    """Compact summary of what earlier responses did to the project.
+
+    Sent instead of the raw chat history in compact context mode: file paths with the
+    classes and functions they define, touched settings, installed apps, URL routes,
+    dependencies and commands, rather than every earlier file body.
+    """
+
+    def __init__(self):
+        self.files: Dict[str, List[str]] = {}
+        self.settings: Dict[str, str] = {}
+        self.installed_apps: List[str] = []
+        self.dependencies: List[str] = []
+        self.routes: List[str] = []
+        self.commands: List[str] = []
+
+    def copy(self) -> "ProjectManifest":
+        return copy.deepcopy(self)
+
+    def record(self, instructions: List[Dict]):
+        for instruction in instructions or []:
+            kind = instruction.get("type")
+            if kind == "file" and instruction.get("filename"):
+                self.files[instruction["filename"]] = self._symbols(instruction["filename"],
+                                                                    instruction.get("content") or "")
+            elif kind == "update_settings" and instruction.get("variable_name"):
+                self._record_setting(instruction)
+            elif kind == "dependencies":
+                for dependency in instruction.get("dependencies") or []:
+                    if dependency not in self.dependencies:
+                        self.dependencies.append(dependency)
+            elif kind == "include_urls":
+                for prefix, module in instruction.get("urls") or []:
+                    if f"{prefix} -> {module}" not in self.routes:
+                        self.routes.append(f"{prefix} -> {module}")
+            elif kind == "command" and instruction.get("command"):
+                self.commands.append(instruction["command"])
+
+    def _record_setting(self, instruction: Dict):
+        name, value, action = instruction["variable_name"], instruction.get("value"), instruction.get("action")
+        if name == "INSTALLED_APPS" and action in ("add", "remove"):
+            if action == "add" and value not in self.installed_apps:
+                self.installed_apps.append(value)
+            elif action == "remove" and value in self.installed_apps:
+                self.installed_apps.remove(value)
+            return
+        if action in ("add", "remove"):
+            self.settings[name] = f"{self.settings.get(name, '')} {action} {value!r}".strip()
+        else:
+            self.settings[name] = repr(value)
+
+    @staticmethod
+    def _symbols(filename: str, content: str) -> List[str]:
+        if not filename.endswith(".py"):
+            return []
+        try:
+            tree = ast.parse(content)
+        except SyntaxError:
+            return []
+        return [node.name for node in tree.body
+                if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))]
+
+    def render(self) -> str:
+        """Render the manifest as a prompt preamble, or an empty string if nothing was recorded."""
+        lines = []
+        if self.files:
+            lines.append("Files already in the project:")
+            for path, symbols in self.files.items():
+                lines.append(f"- {path}" + (f" (defines {', '.join(symbols)})" if symbols else ""))
+        if self.installed_apps:
+            lines.append(f"Apps added to INSTALLED_APPS: {', '.join(self.installed_apps)}")
+        if self.settings:
+            lines.append("Settings already configured:")
+            lines.extend(f"- {name}: {value}" for name, value in self.settings.items())
+        if self.routes:
+            lines.append(f"Routes included in the project's urls.py: {', '.join(self.routes)}")
+        if self.dependencies:
+            lines.append(f"Installed dependencies: {', '.join(self.dependencies)}")
+        if self.commands:
+            lines.append(f"Commands already run: {'; '.join(self.commands)}")
+        return "\n".join(lines)
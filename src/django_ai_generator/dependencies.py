@@ -0,0 +1,140 @@
+import re
+import subprocess
+import sys
+from contextlib import nullcontext
+from importlib import metadata
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from rich.console import Console
+
+from .cache import default_cache_dir
+from .tracing import tracer
+
+try:
+    from packaging.requirements import InvalidRequirement, Requirement
+except ImportError:
+    Requirement = None
+
+console = Console()
+
+_NAME_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+_pip_lock = None
+
+
+def set_pip_lock(lock):
+    """Make every pip run in this process hold ``lock``, e.g. one shared by the workers of a batch.
+
+    Processes that install into the same interpreter and wheel cache must not run pip at
+    the same time.
+    """
+    global _pip_lock
+    _pip_lock = lock
+
+
+def canonical_name(requirement: str) -> str:
+    match = _NAME_RE.match(requirement)
+    name = match.group(1) if match else requirement.strip()
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def is_satisfied(requirement: str) -> bool:
+    """Return True if the requirement is already met by an installed distribution."""
+    try:
+        installed = metadata.version(canonical_name(requirement))
+    except metadata.PackageNotFoundError:
+        return False
+    if Requirement is None:
+        # Without packaging only bare names can be checked
+        match = _NAME_RE.match(requirement)
+        return bool(match) and match.end() == len(requirement.strip())
+    try:
+        parsed = Requirement(requirement)
+    except InvalidRequirement:
+        return False
+    if parsed.extras or parsed.url:
+        return False
+    return parsed.specifier.contains(installed, prereleases=True)
+
+
+class DependencyInstaller:
+    """Collects requested packages and installs them with as few pip runs as possible.
+
+    Requirements are deduplicated by canonical name, already satisfied ones are skipped and
+    the rest are installed in one pip run. Built wheels are kept in a local cache, so a
+    repeated run installs without touching the network. When the batch fails, it is
+    bisected to find the failing requirements, which are handed to ``refactor`` (at most
+    ``max_refactor_depth`` times) for replacements.
+    """
+
+    def __init__(self, wheel_cache: Optional[str] = None, max_refactor_depth: int = 2):
+        self.wheel_cache = Path(wheel_cache) if wheel_cache else default_cache_dir() / "wheels"
+        self.max_refactor_depth = max_refactor_depth
+        self.pending: Dict[str, str] = {}
+        self.installed: Dict[str, str] = {}
+
+    def add(self, requirements: List[str]):
+        for requirement in requirements or []:
+            name = canonical_name(requirement)
+            if name not in self.installed:
+                self.pending[name] = requirement.strip()
+
+    def install(self, refactor: Callable[[List[Dict[str, str]]], List[str]]):
+        depth = 0
+        while self.pending:
+            requirements = list(self.pending.values())
+            self.pending.clear()
+            missing = [requirement for requirement in requirements if not is_satisfied(requirement)]
+            for requirement in requirements:
+                if requirement not in missing:
+                    self.installed[canonical_name(requirement)] = requirement
+            if not missing:
+                continue
+
+            console.print(f"[yellow]Installing dependencies: {', '.join(missing)}...[/yellow]")
+            failed = self._install_batch(missing)
+            for requirement in missing:
+                if requirement not in [item["name"] for item in failed]:
+                    self.installed[canonical_name(requirement)] = requirement
+            if not failed:
+                console.print("[green]Dependencies installed successfully![/green]")
+                continue
+
+            console.print(f"[red]Failed dependencies: {', '.join(item['name'] for item in failed)}![/red]")
+            if depth >= self.max_refactor_depth:
+                raise RuntimeError(f"Could not install dependencies: {', '.join(item['name'] for item in failed)}")
+            depth += 1
+            self.add(refactor(failed))
+
+    def _install_batch(self, requirements: List[str]) -> List[Dict[str, str]]:
+        """Install requirements, bisecting on failure; return the ones that could not be installed."""
+        error = self._pip_install(requirements)
+        if error is None:
+            return []
+        if len(requirements) == 1:
+            return [{"name": requirements[0], "error": error}]
+        middle = len(requirements) // 2
+        return self._install_batch(requirements[:middle]) + self._install_batch(requirements[middle:])
+
+    def _pip_install(self, requirements: List[str]) -> Optional[str]:
+        """Install from the wheel cache, building missing wheels first; return pip's error output on failure."""
+        self.wheel_cache.mkdir(parents=True, exist_ok=True)
+        offline = [sys.executable, "-m", "pip", "install", "--no-index", "--find-links", str(self.wheel_cache)]
+        if self._pip(offline + requirements) is None:
+            return None
+        error = self._pip([sys.executable, "-m", "pip", "wheel", "--wheel-dir", str(self.wheel_cache),
+                           "--find-links", str(self.wheel_cache)] + requirements)
+        if error is not None:
+            return error
+        return self._pip(offline + requirements)
+
+    @staticmethod
+    def _pip(command: List[str]) -> Optional[str]:
+        with _pip_lock if _pip_lock is not None else nullcontext(), \
+                tracer.span(f"pip {command[3]}", "pip", requirements=command[command.index("--find-links") + 2:]) as span:
+            result = subprocess.run(command, capture_output=True, text=True)
+            span["returncode"] = result.returncode
+        if result.returncode == 0:
+            return None
+        return (result.stderr or result.stdout).strip()[-2000:]
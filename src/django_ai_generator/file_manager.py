@@ -1,120 +1,134 @@
-import ast
+import hashlib
 import os
-import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .manifest import content_hash
+from .settings_document import SettingsDocument
+from .tracing import tracer
+
+# Read once: os.umask can only be queried by setting it, which is not thread-safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
 
 class FileManager:
-    def __init__(self, project_name):
+    def __init__(self, project_name, root: str = "."):
         self.project_name = project_name
+        self.root = root
         self.settings_path = None
+        self.settings = None
+        # Bumped whenever the project changes on disk through this manager
+        self.revision = 0
 
     def create_file(self, path: str, content: str = ""):
         """Create a file and write content to it."""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, 'w') as f:
-            f.write(content)
+        self.write_files([(path, content)])
+
+    def write_files(self, files: Iterable[Tuple[str, str]], max_workers: Optional[int] = None) -> Dict[str, int]:
+        """Write many files at once and return counts of written, unchanged files and directories.
+
+        Every distinct directory is created once, files are written concurrently through a
+        temporary file and an atomic rename, and files whose content is already on disk are
+        left alone. For duplicate paths the last content wins.
+        """
+        files = {path: content or "" for path, content in files}
+        if self.settings is not None and any(self.is_settings_path(path) for path in files):
+            # A file replaces settings.py, so pending edits must land before it
+            self.flush_settings()
+            self.settings = None
+
+        with tracer.span("write_files", "files", files=len(files)) as span:
+            files = {self.path(path): content for path, content in files.items()}
+            directories = {os.path.dirname(path) for path in files} - {""}
+            for directory in sorted(directories):
+                os.makedirs(directory, exist_ok=True)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                written = list(executor.map(lambda item: self._write_if_changed(*item), files.items()))
+            span["written"] = written.count(True)
+        if any(written):
+            self.revision += 1
+        return {"written": written.count(True), "unchanged": written.count(False), "directories": len(directories)}
+
+    def remove_files(self, files: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """Remove files whose content still has the given hash.
+
+        Returns the removed paths and the paths left alone because they were modified.
+        """
+        removed, modified = [], []
+        for path, expected_hash in files.items():
+            path = self.path(path)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    current_hash = content_hash(f.read())
+            except FileNotFoundError:
+                continue
+            if current_hash != expected_hash:
+                modified.append(path)
+                continue
+            os.remove(path)
+            removed.append(path)
+            self.revision += 1
+        return removed, modified
+
+    def path(self, path: str) -> str:
+        """Resolve a project-relative path against the project root."""
+        return os.path.join(self.root, path)
+
+    def is_settings_path(self, path: str) -> bool:
+        return Path(self.path(path)).resolve() == Path(self.root, self.project_name, "settings.py").resolve()
+
+    @staticmethod
+    def _write_if_changed(path: str, content: str) -> bool:
+        data = content.encode("utf-8")
+        try:
+            with open(path, "rb") as f:
+                if hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest():
+                    return False
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return True
 
     def _load_settings(self):
-        self.settings_path = Path(os.path.join(self.project_name, "settings.py"))
+        self.settings_path = Path(self.root, self.project_name, "settings.py")
         if not self.settings_path.exists():
             raise FileNotFoundError(f"Settings file not found at {self.settings_path}")
 
-    def _read_settings(self) -> str:
-        return self.settings_path.read_text()
-
-    def _write_settings(self, content: str):
-        self.settings_path.write_text(content)
-
-    def _parse_value(self, value: Any) -> str:
-        if isinstance(value, str):
-            return f"'{value}'"
-        elif isinstance(value, (list, tuple, set)):
-            return str(value)
-        elif isinstance(value, dict):
-            return str(value)
-        return str(value)
-
-    def _find_variable(self, content: str, variable_name: str) -> Optional[tuple[int, int]]:
-        pattern = rf"{variable_name}\s*=\s*"
-        match = re.search(pattern, content)
-        if not match:
-            return None
-
-        start_pos = match.start()
-
-        remaining = content[match.end():].split('\n')[0]
-        try:
-            # single-line value
-            ast.parse(remaining)
-            end_pos = match.end() + len(remaining)
-            return start_pos, end_pos
-        except SyntaxError:
-            # multiline value
-            bracket_count = 0
-            end_pos = match.end()
-
-            for char in content[match.end():]:
-                end_pos += 1
-                if char in '[{(':
-                    bracket_count += 1
-                elif char in ']})':
-                    bracket_count -= 1
-                elif char == '\n' and bracket_count == 0:
-                    break
-
-            return start_pos, end_pos
+    def _settings_document(self) -> SettingsDocument:
+        if self.settings is None or (not self.settings.dirty and self.settings.is_stale()):
+            self._load_settings()
+            self.settings = SettingsDocument(self.settings_path)
+        return self.settings
 
-    def update_setting(self, variable_name: str, value: Any, operation_type: Optional[str] = None):
+    def use_settings(self, content: str):
+        """Use known settings.py content, already on disk, instead of parsing the file."""
         self._load_settings()
-        content = self._read_settings()
-        var_pos = self._find_variable(content, variable_name)
-
-        if var_pos is None and operation_type in ('add', 'remove'):
-            raise ValueError(f"Cannot {operation_type} from non-existent variable {variable_name}")
-
-        if operation_type is None or operation_type == "set":
-            new_value = self._parse_value(value)
-            if var_pos is None:
-                if content and not content.endswith('\n'):
-                    content += '\n'
-                content += f"{variable_name} = {new_value}\n"
-            else:
-                start, end = var_pos
-                content = content[:start] + f"{variable_name} = {new_value}" + content[end:]
-        else:
-            start, end = var_pos
-            existing_value = content[start:end].split('=')[1].strip()
-            try:
-                current_value = ast.literal_eval(existing_value)
-            except (SyntaxError, ValueError):
-                raise ValueError(f"Could not parse existing value for {variable_name}")
-
-            if not isinstance(current_value, (list, tuple, set)):
-                raise TypeError(f"{variable_name} must be a list, tuple, or set for add/remove operations")
-
-            if isinstance(current_value, tuple):
-                current_value = list(current_value)
-            elif isinstance(current_value, set):
-                current_value = list(current_value)
-
-            if operation_type == 'add' and value not in current_value:
-                current_value.append(value)
-            elif operation_type == 'remove' and value in current_value:
-                current_value.remove(value)
-
-            if isinstance(current_value, list):
-                if isinstance(existing_value, tuple):
-                    current_value = tuple(current_value)
-                elif isinstance(existing_value, set):
-                    current_value = set(current_value)
-
-            content = (
-                    content[:start] +
-                    f"{variable_name} = {self._parse_value(current_value)}" +
-                    content[end:]
-            )
-
-        self._write_settings(content)
+        self.settings = SettingsDocument(self.settings_path, content)
 
+    def update_setting(self, variable_name: str, value: Any, operation_type: Optional[str] = None):
+        """Apply a settings edit in memory; call ``flush_settings`` to write it to disk."""
+        self._settings_document().update(variable_name, value, operation_type)
+
+    def flush_settings(self):
+        """Write pending settings edits to disk.
+
+        The parsed document is kept for later edits and only re-read if settings.py is
+        changed on disk by something else, such as a command.
+        """
+        if self.settings is not None and self.settings.dirty:
+            with tracer.span("flush", "settings"):
+                self.settings.flush()
+            self.revision += 1
@@ -1,10 +1,24 @@
 import subprocess
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Optional, TYPE_CHECKING
 import os
 from rich.console import Console
+from rich.markup import escape
 
-from .api_client import GeminiClient
+from .commands import CommandExecutor
+from .dependencies import DependencyInstaller
 from .file_manager import FileManager
+from .journal import JOURNAL_FILE, Journal
+from .library import InstructionLibrary, LibraryMatch, include_urls
+from .manifest import GenerationManifest, MANIFEST_FILE, input_hash
+from .plan import Plan
+from .skeleton import project_files
+from .tracing import tracer
+from .validation import ProjectValidator
+
+if TYPE_CHECKING:
+    from .api_client import GeminiClient
 
 console = Console()
 
@@ -13,87 +27,547 @@ class ProjectGenerator:
     def __init__(self, name: str, options: Dict):
         self.name = name
         self.options = options
-        self.api_client = GeminiClient(project_name=self.name, options=self.options)
-        self.file_manager = FileManager(project_name=self.name)
+        self.output_dir = self.options.get("output_dir") or "."
+        self.project_dir = os.path.join(self.output_dir, self.name)
+        self._api_client = None
+        # Chat turns of replayed jobs, held until a client is needed
+        self._pending_turns: List[Dict] = []
+        self.file_manager = FileManager(project_name=self.name, root=self.project_dir)
+        self.dependencies = DependencyInstaller(max_refactor_depth=self.options.get("max_refactor_depth", 2))
+        self.library = InstructionLibrary() if self.options.get("library", True) else None
+        self.commands = CommandExecutor(self.project_dir, f"{self.name}.settings")
+        self.journal: Optional[Journal] = None
+        self.validator = ProjectValidator(self.project_dir) if self.options.get("validate", True) else None
+        # Replaying a plan must not call the API, so failing files are only reported
+        self.repair = True
+        self._validated_revision = self.file_manager.revision
+
+    @property
+    def api_client(self) -> "GeminiClient":
+        """Gemini client, created on first use so replaying a plan needs no API key (nor imports requests)."""
+        if self._api_client is None:
+            from .api_client import GeminiClient
+
+            self._api_client = GeminiClient(project_name=self.name, options=self.options)
+            self._api_client.extend_history(self._pending_turns)
+            self._pending_turns = []
+        return self._api_client
+
+    def _chat_length(self) -> int:
+        return len(self._api_client.chat) if self._api_client is not None else len(self._pending_turns)
 
-    def generate(self):
-        """Main method to generate the project."""
+    def generate(self) -> bool:
+        """Main method to generate the project. Returns whether generation succeeded."""
         try:
+            with tracer.span("generate", "run", project=self.name):
+                self._generate()
+            if self._api_client is not None:
+                self._api_client.print_stats()
+            return True
+
+        except Exception as e:
+            console.print(f"[red]Project generation failed: {e}[/red]")
+            if self.journal is not None:
+                console.print(f"[yellow]Progress is journaled, continue with: django-gen --resume "
+                              f"{self.project_dir}[/yellow]")
+            return False
+
+        finally:
+            self.commands.close()
+            if self.journal is not None:
+                self.journal.close()
+            self._write_trace()
+
+    def _write_trace(self):
+        if self.options.get("trace"):
+            tracer.write(self.options["trace"])
+            tracer.print_summary()
+            console.print(f"[blue]Trace written to {self.options['trace']}[/blue]")
+
+    def _generate(self):
+        if self.options.get("dry_run") or self.options.get("plan_out"):
+            plan = self.build_plan()
+            if self.options.get("plan_out"):
+                plan.save(self.options["plan_out"])
+                console.print(f"[green]Plan saved to {self.options['plan_out']}[/green]")
+            if self.options.get("dry_run"):
+                plan.print()
+                # Nothing was created, so there is nothing to install or validate
+                return
             self._create_project()
-            authentication = self.options.get("authentication")
-            if authentication:
-                instructions = self.api_client.get_authentication_instructions(self.options.get("auth_type"),
-                                                                               self.options.get("auth_prompt"))
-                self.run_instructions(instructions)
+            self.run_instructions(plan.instructions())
+        elif self.options.get("update"):
+            self.update()
+        elif self.options.get("resume"):
+            self.resume()
+        else:
+            self._create_project()
+            self.journal = Journal(os.path.join(self.project_dir, JOURNAL_FILE))
+            self.journal.start(self.name, {key: value for key, value in self.options.items()
+                                           if key not in ("output_dir", "resume")})
+            self._run_jobs(GenerationManifest(os.path.join(self.project_dir, MANIFEST_FILE)))
+        self._install_pending_dependencies()
+        self._validate()
+        if self.journal is not None and not self.journal.finished:
+            self.journal.finish()
+
+    def resume(self):
+        """Continue an interrupted run from the journal in the project directory.
 
-            for app in self.options.get("apps"):
-                instructions = self.api_client.get_app_instructions(app)
-                self.run_instructions(instructions)
+        Jobs whose response was journaled are replayed without calling the API, skipping
+        the instructions already applied; the remaining jobs are requested as usual. A job
+        whose stream was cut off is requested again, skipping the commands it already ran.
+        """
+        journal_path = os.path.join(self.project_dir, JOURNAL_FILE)
+        if not os.path.exists(journal_path):
+            raise FileNotFoundError(f"No {JOURNAL_FILE} in {self.project_dir}, nothing to resume")
+        self.journal = Journal.load(journal_path)
+        if self.journal.finished:
+            console.print("[green]The journaled run already finished, nothing to resume[/green]")
+            return
+        console.print(f"[blue]Resuming: {len(self.journal.responses)} responses journaled[/blue]")
+        self._run_jobs(GenerationManifest.load(os.path.join(self.project_dir, MANIFEST_FILE)))
+
+    def _run_jobs(self, manifest: GenerationManifest):
+        """Fetch and apply every job, journaling each response and the progress made applying it."""
+        chat_mark = 0
+        for key, instructions in self._iter_instructions():
+            journaled = key in self.journal.responses
+            done = self.journal.applied.get(key, 0)
+            checkpoint = lambda count, key=key, done=done: self.journal.mark_applied(key, done + count)
+            if journaled:
+                # Already installed or not, skipped packages must still be queued
+                for instruction in instructions[:done]:
+                    if instruction.get("type") == "dependencies":
+                        self.dependencies.add(instruction.get("dependencies"))
+            else:
+                ran = {instruction.get("command") for instruction in self.journal.partial.get(key, [])
+                       if instruction.get("type") == "command"}
+                if ran:
+                    # Cut off mid-stream last time: requested again, but its commands already ran
+                    kept = (instruction for instruction in instructions
+                            if instruction.get("type") != "command" or instruction.get("command") not in ran)
+                    instructions = list(kept) if isinstance(instructions, list) else kept
+                if isinstance(instructions, list):
+                    chat_mark = self._journal_response(key, instructions, chat_mark)
+                else:
+                    received = []
+                    instructions = self._collect(instructions, received)
+                    checkpoint = lambda count, key=key, received=received: self.journal.partial_response(
+                        key, received[:count])
+            with tracer.span(key, "job"):
+                executed = self.run_instructions(instructions[done:] if done else instructions, checkpoint=checkpoint)
+            executed = instructions[:done] + executed if done else executed
+            if not journaled and not isinstance(instructions, list):
+                # Streamed responses are only complete once applied
+                chat_mark = self._journal_response(key, executed, chat_mark)
+            chat_mark = self._chat_length()
+            manifest.record(key, self._job_inputs()[key], executed)
+            manifest.save()
+
+    @staticmethod
+    def _collect(instructions, received: List[Dict]):
+        """Pass a stream of instructions through, keeping each one in ``received``."""
+        for instruction in instructions:
+            received.append(instruction)
+            yield instruction
 
+    def _journal_response(self, key: str, instructions: List[Dict], chat_mark: int) -> int:
+        chat = self.api_client.chat
+        self.journal.response(key, instructions, chat[chat_mark:])
+        return len(chat)
+
+    def build_plan(self) -> Plan:
+        """Fetch the instructions of every job and compile them into a plan without touching disk."""
+        plan = Plan(self.name, self.options)
+        for _, instructions in self._iter_instructions(queue_dependencies=False):
+            plan.add(instructions)
+        return plan
+
+    def update(self):
+        """Regenerate only the jobs whose inputs changed since the manifest was written.
+
+        Changed jobs are requested with a compact summary of the unchanged ones as context,
+        and only the difference with their previous output is applied: stale files the user
+        has not edited are removed, stale INSTALLED_APPS-style additions are reverted, and
+        commands and dependencies that already ran are skipped.
+        """
+        manifest_path = os.path.join(self.project_dir, MANIFEST_FILE)
+        if not os.path.isdir(self.project_dir):
+            raise FileNotFoundError(f"Project directory {self.project_dir} not found, generate it first")
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No {MANIFEST_FILE} in {self.project_dir}, regenerate the project without --update")
+        manifest = GenerationManifest.load(manifest_path)
+        inputs = self._job_inputs()
+        hashes = {key: input_hash(job_inputs) for key, job_inputs in inputs.items()}
+        changed = [key for key, job_hash in hashes.items()
+                   if key not in manifest.jobs or manifest.jobs[key]["hash"] != job_hash]
+        removed = [key for key in manifest.jobs if key not in hashes]
+        if not changed and not removed:
+            console.print("[green]Project is up to date[/green]")
+            return
+
+        self.api_client.context_mode = "compact"
+        for key, entry in manifest.jobs.items():
+            if key not in changed and key not in removed:
+                self.api_client.manifest.record(entry["instructions"])
+
+        for key in removed:
+            console.print(f"[yellow]Removing output of {key}...[/yellow]")
+            self._apply_update(manifest.jobs[key], [])
+            manifest.remove(key)
+            manifest.save()
+        for key, instructions in self._iter_instructions(only=changed):
+            console.print(f"[yellow]Updating {key}...[/yellow]")
+            instructions = list(instructions)
+            self._apply_update(manifest.jobs.get(key), instructions)
+            manifest.record(key, inputs[key], instructions)
+            manifest.save()
+
+    def _apply_update(self, entry: Dict, instructions: List[Dict]):
+        """Apply the difference between a job's previous output (its manifest entry) and its new instructions."""
+        old = entry["instructions"] if entry else []
+        new_files = {instruction.get("filename") for instruction in instructions if instruction.get("type") == "file"}
+        stale_files = {path: file_hash for path, file_hash in (entry or {}).get("files", {}).items()
+                       if path not in new_files}
+        removed, modified = self.file_manager.remove_files(stale_files)
+        for path in modified:
+            console.print(f"[yellow]Keeping {path}: it was edited after generation[/yellow]")
+        if removed:
+            console.print(f"[green]Removed {len(removed)} stale files[/green]")
+
+        new_edits = [(instruction.get("variable_name"), instruction.get("value")) for instruction in instructions
+                     if instruction.get("type") == "update_settings" and instruction.get("action") == "add"]
+        old_commands = {instruction.get("command") for instruction in old if instruction.get("type") == "command"}
+        old_dependencies = {dependency for instruction in old if instruction.get("type") == "dependencies"
+                            for dependency in instruction.get("dependencies") or []}
+
+        diff = [{"variable_name": instruction.get("variable_name"), "value": instruction.get("value"),
+                 "action": "remove", "type": "update_settings"}
+                for instruction in old
+                if instruction.get("type") == "update_settings" and instruction.get("action") == "add"
+                and (instruction.get("variable_name"), instruction.get("value")) not in new_edits]
+        for instruction in instructions:
+            if instruction.get("type") == "command" and instruction.get("command") in old_commands:
+                continue
+            if instruction.get("type") == "dependencies":
+                instruction = dict(instruction, dependencies=[dependency for dependency in instruction.get("dependencies") or []
+                                                              if dependency not in old_dependencies])
+            diff.append(instruction)
+        self.run_instructions(diff)
+
+    def _job_inputs(self) -> Dict[str, Dict]:
+        """Return the inputs of every job, keyed like ``_jobs``."""
+        inputs = {}
+        if self.options.get("authentication"):
+            inputs["authentication"] = {"type": self.options.get("type"), "auth_type": self.options.get("auth_type"),
+                                        "auth_prompt": self.options.get("auth_prompt")}
+        for app in self.options.get("apps") or []:
+            inputs[app["name"]] = {"type": self.options.get("type"), "app": app}
+        return inputs
+
+    def replay(self, plan: Plan) -> bool:
+        """Create the project from a saved plan, without calling the API. Returns whether it succeeded."""
+        self.repair = False
+        try:
+            with tracer.span("replay", "run", project=self.name):
+                self._create_project()
+                self.run_instructions(plan.instructions())
+                self._install_pending_dependencies()
+                self._validate()
+            return True
         except Exception as e:
             console.print(f"[red]Project generation failed: {e}[/red]")
+            return False
+        finally:
+            self.commands.close()
+            self._write_trace()
 
-    def run_instructions(self, instructions):
-        for instruction in instructions:
-            if instruction.get("type") == "command":
-                self._run_command(instruction.get("command"))
-            elif instruction.get("type") == "file":
-                self._configure_file(instruction)
-            elif instruction.get("type") == "update_settings":
-                self._update_settings(instruction)
-            elif instruction.get("type") == "dependencies":
-                self._install_dependencies(instruction.get("dependencies"))
-
-    def _install_django(self):
-        """Install Django using pip."""
-        console.print("[yellow]Django not found. Installing Django...[/yellow]")
+    def _jobs(self, only: List[str] = None) -> List[tuple]:
+        """Return the (key, fetch, depends_on) jobs for the project, in declaration order.
+
+        ``only`` restricts the jobs to the given keys, dropping dependencies on the others.
+        """
+        jobs = []
+        stream = self.options.get("stream", False)
+        project_type = self.options.get("type")
+        if self.options.get("authentication"):
+            auth_type = self.options.get("auth_type")
+            match = self.library.match_auth(project_type, auth_type,
+                                            self.options.get("auth_prompt")) if self.library else None
+            template = self._use_library(match, "authentication")
+            jobs.append(("authentication",
+                         lambda client, template=template: client.get_authentication_instructions(
+                             auth_type, self.options.get("auth_prompt"), stream=stream, **template),
+                         []))
+        for app in self.options.get("apps") or []:
+            template = self._use_library(self.library.match_app(project_type, app) if self.library else None,
+                                         app["name"])
+            jobs.append((app["name"],
+                         lambda client, app=app, template=template: client.get_app_instructions(app, stream=stream,
+                                                                                                 **template),
+                         app.get("depends_on", [])))
+        if only is not None:
+            jobs = [(key, fetch, [dependency for dependency in depends_on if dependency in only])
+                    for key, fetch, depends_on in jobs if key in only]
+        if self.journal is not None:
+            jobs = [(key, self._replay_fetch(key) if key in self.journal.responses else fetch, depends_on)
+                    for key, fetch, depends_on in jobs]
+        return jobs
+
+    def _replay_fetch(self, key: str):
+        """Return a fetch that answers a job from its journaled response, without calling the API.
+
+        Given no client, the turns are held until one is created, so resuming a run whose
+        responses are all journaled needs no API key.
+        """
+        response = self.journal.responses[key]
+
+        def fetch(client):
+            if client is not None:
+                client.extend_history(response["turns"])
+            else:
+                self._pending_turns.extend(response["turns"])
+            return list(response["instructions"])
+        return fetch
+
+    def _replayed(self, key: str) -> bool:
+        return self.journal is not None and key in self.journal.responses
+
+    def _use_library(self, match: Optional[LibraryMatch], app_name: str) -> Dict:
+        """Return the template arguments for a job answered from the instruction library, if it matched."""
+        if match is None:
+            return {}
+        if match.exact:
+            console.print(f"[blue]Using library entry {match.entry['name']} for {app_name}[/blue]")
+        else:
+            console.print(f"[blue]Using library entry {match.entry['name']} for {app_name}, asking Gemini for: "
+                          f"{', '.join(match.missing)}[/blue]")
+        return {"template": self.library.render(match.entry, app_name, self.name), "customize": not match.exact}
+
+    def _iter_instructions(self, only: List[str] = None, queue_dependencies: bool = True):
+        """Yield (key, instructions) for every job in the order they must be applied.
+
+        In stream mode each job yields a lazy iterable, so ``run_instructions`` applies
+        every instruction while the rest of the response is still being generated.
+        ``queue_dependencies`` is off when the instructions are not going to be applied.
+        """
+        workers = self.options.get("workers") or 1
+        jobs = self._schedule(self._jobs(only))
+        if workers <= 1 or all(self._replayed(key) for key, _, _ in jobs):
+            for key, fetch, _ in jobs:
+                yield key, fetch(self._api_client if self._replayed(key) else self.api_client)
+        else:
+            yield from self._fetch_concurrently(workers, jobs, queue_dependencies)
+
+    def _fetch_concurrently(self, workers: int, jobs: List[tuple], queue_dependencies: bool = True):
+        """Fetch the instructions of scheduled jobs in a worker pool and yield them in dependency order.
+
+        A job only starts once the jobs it depends on have answered, and sees the chat history
+        from before the pool started plus the turns of its dependencies as context, so its
+        request does not depend on thread timing. Applying the results stays on the calling
+        thread, so file writes and settings edits happen in the same order as in a sequential
+        run.
+        """
+        if self.options.get("stream"):
+            # Workers drain the stream themselves; the fetches still overlap each other
+            jobs = [(key, lambda client, fetch=fetch: list(fetch(client)), depends_on)
+                    for key, fetch, depends_on in jobs]
+        ancestors = {}
+        for key, _, depends_on in jobs:
+            ancestors[key] = []
+            for dependency in depends_on:
+                for ancestor in ancestors[dependency] + [dependency]:
+                    if ancestor not in ancestors[key]:
+                        ancestors[key].append(ancestor)
+
+        futures = {}
+        # Every job starts from the history as it is now, not as the main thread extends it
+        snapshot = self.api_client.fork()
+
+        def fetch_job(key, fetch):
+            client = snapshot.fork()
+            for ancestor in ancestors[key]:
+                client.extend_history(futures[ancestor].result()[1])
+            start = len(client.chat)
+            instructions = fetch(client)
+            return instructions, client.chat[start:]
+
+        executor = ThreadPoolExecutor(max_workers=workers)
         try:
-            subprocess.check_call(["pip", "install", "django"])
-            console.print("[green]Django installed successfully![/green]")
-        except subprocess.CalledProcessError as e:
-            console.print(f"[red]Failed to install Django: {e}[/red]")
-            raise RuntimeError("Could not install Django. Please check your environment.")
+            for key, fetch, _ in jobs:
+                futures[key] = executor.submit(fetch_job, key, fetch)
+            for index, (key, _, _) in enumerate(jobs):
+                instructions, turns = futures[key].result()
+                self.api_client.extend_history(turns)
+                # Queue the packages of every answer received so far, so they go in one pip run
+                for later_key, _, _ in jobs[index:] if queue_dependencies else []:
+                    if futures[later_key].done() and not futures[later_key].exception():
+                        for instruction in futures[later_key].result()[0]:
+                            if instruction.get("type") == "dependencies":
+                                self.dependencies.add(instruction.get("dependencies"))
+                yield key, instructions
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
 
-    def _create_project(self):
-        """Create a Django project using `django-admin startproject`."""
+    @staticmethod
+    def _schedule(jobs: List[tuple]) -> List[tuple]:
+        """Order jobs so that every job comes after its dependencies, keeping declaration order otherwise."""
+        keys = {key for key, _, _ in jobs}
+        for key, _, depends_on in jobs:
+            unknown = [dependency for dependency in depends_on if dependency not in keys]
+            if unknown:
+                raise ValueError(f"App {key} depends on unknown apps: {', '.join(unknown)}")
+
+        ordered, done = [], set()
+        pending = list(jobs)
+        while pending:
+            ready = [job for job in pending if all(dependency in done for dependency in job[2])]
+            if not ready:
+                raise ValueError(f"Circular app dependencies: {', '.join(job[0] for job in pending)}")
+            job = ready[0]
+            ordered.append(job)
+            done.add(job[0])
+            pending.remove(job)
+        return ordered
+
+    def run_instructions(self, instructions, checkpoint=None):
+        """Run instructions in order.
+
+        Files and settings edits are buffered and written in bulk right before a command
+        needs them on disk, and at the end of the batch. Files of a lazy stream are written
+        as they arrive instead, while the rest of the response is still being generated.
+        Returns the instructions consumed.
+        ``checkpoint`` is called with the number of instructions on disk after every command
+        and once the batch is written, also when it fails.
+        """
+        files = {}
+        executed = []
+        failed = False
+        streamed = not isinstance(instructions, list)
         try:
-            console.print(f"[blue]Creating Django project: {self.name}...[/blue]")
-            subprocess.check_call(["django-admin", "startproject", self.name])
-            console.print("[green]Project created successfully![/green]")
-            os.chdir(self.name)
-            console.print(f"[blue]Changed working directory to {self.name}[/blue]")
-        except FileNotFoundError as e:
-            if "django-admin" in str(e):
-                self._install_django()
-                self._create_project()  # Retry after installing Django
-            else:
-                console.print(f"[red]Error: {e}[/red]")
-                raise
-        except subprocess.CalledProcessError as e:
-            console.print(f"[red]Failed to create Django project: {e}[/red]")
+            for instruction in instructions:
+                executed.append(instruction)
+                with tracer.span(instruction.get("type") or "unknown", "instruction"):
+                    self._run_instruction(instruction, files)
+                    if streamed:
+                        self._configure_files(files)
+                if checkpoint is not None and instruction.get("type") == "command":
+                    checkpoint(len(executed))
+        except Exception:
+            failed = True
             raise
+        finally:
+            self._configure_files(files)
+            self.file_manager.flush_settings()
+            if checkpoint is not None:
+                checkpoint(len(executed) - 1 if failed else len(executed))
+        return executed
+
+    def _run_instruction(self, instruction: Dict, files: Dict[str, str]):
+        """Dispatch one instruction, adding file instructions to the ``files`` buffer."""
+        if instruction.get("type") == "command":
+            self._configure_files(files)
+            self.file_manager.flush_settings()
+            if "manage.py" in instruction.get("command", ""):
+                self._require_django()
+            self._install_pending_dependencies()
+            self._validate()
+            self._run_command(instruction.get("command"))
+        elif instruction.get("type") == "file":
+            files[instruction.get("filename")] = instruction.get("content")
+        elif instruction.get("type") == "update_settings":
+            if any(self.file_manager.is_settings_path(path) for path in files):
+                self._configure_files(files)
+            self._update_settings(instruction)
+        elif instruction.get("type") == "dependencies":
+            self._install_dependencies(instruction.get("dependencies"))
+        elif instruction.get("type") == "include_urls":
+            self._include_urls(instruction.get("urls"), files)
+
+    def _create_project(self):
+        """Create the Django project skeleton, like `django-admin startproject` but in-process."""
+        console.print(f"[blue]Creating Django project: {self.name}...[/blue]")
+        if os.path.exists(self.project_dir) and os.listdir(self.project_dir):
+            console.print(f"[red]Failed to create Django project: {self.project_dir} already exists[/red]")
+            if os.path.exists(os.path.join(self.project_dir, JOURNAL_FILE)):
+                console.print(f"[yellow]Continue its interrupted run with: django-gen --resume "
+                              f"{self.project_dir}[/yellow]")
+            raise FileExistsError(f"{self.project_dir} already exists")
+        files = project_files(self.name)
+        self.file_manager.write_files(files.items())
+        os.chmod(self.file_manager.path("manage.py"), 0o755)
+        # The settings are known, so parse them from memory instead of reading them back
+        self.file_manager.use_settings(files[f"{self.name}/settings.py"])
+        GenerationManifest(os.path.join(self.project_dir, MANIFEST_FILE)).save()
+        console.print("[green]Project created successfully![/green]")
 
     def _run_command(self, command: str):
-        """Run a command in the project's root directory."""
+        """Run a command in the project's root directory.
+
+        Consecutive manage.py commands share one Django process; see ``CommandExecutor``.
+        """
         try:
             if "makemigrations" not in command or "migrate" not in command:
                 console.print(f"[yellow]Running command: {command}...[/yellow]")
-                subprocess.check_call(command, shell=True)
+                with tracer.span("command", "command", command=command) as span:
+                    result = self.commands.run(command, self.file_manager.revision)
+                    span.update(returncode=result.returncode, in_process=result.in_process,
+                                output=result.output[-2000:])
+                if result.returncode != 0:
+                    if result.output:
+                        console.print(result.output, markup=False, highlight=False)
+                    raise subprocess.CalledProcessError(result.returncode, command, result.output)
                 console.print("[green]Command executed successfully![/green]")
         except subprocess.CalledProcessError as e:
             console.print(f"[red]Failed to run command: {e}[/red]")
             raise
 
-    def _configure_file(self, instruction: Dict):
-        """Configure a file in the project's root directory."""
+    def _validate(self):
+        """Statically check the project if it changed, asking Gemini once to repair the files that fail.
+
+        Runs before commands and at the end of generation. Files still failing after the
+        repair are reported; the commands that use them show the real error.
+        """
+        if self.validator is None or self.file_manager.revision == self._validated_revision:
+            return
+        # Otherwise every django import would be reported as missing
+        self._require_django()
+        self._install_pending_dependencies()
+        problems = self._check_project()
+        if not problems or not self.repair:
+            return
+        console.print(f"[yellow]Asking Gemini to repair {len(problems)} files...[/yellow]")
+        files = {path: {"content": Path(self.file_manager.path(path)).read_text(errors="replace"), "errors": errors}
+                 for path, errors in problems.items()}
+        repaired = self.api_client.repair_files(files)
+        self.run_instructions([instruction for instruction in repaired
+                               if instruction.get("type") in ("file", "update_settings", "dependencies")])
+        self._install_pending_dependencies()
+        if self._check_project():
+            console.print("[red]Some files still fail validation after the repair[/red]")
+
+    def _check_project(self) -> Dict[str, List[str]]:
+        with tracer.span("validate", "validation") as span:
+            problems = self.validator.validate()
+            span.update(failing=len(problems))
+        self._validated_revision = self.file_manager.revision
+        for path, errors in problems.items():
+            for error in errors:
+                console.print(f"[yellow]{path}, {escape(error)}[/yellow]")
+        return problems
+
+    def _configure_files(self, files: Dict[str, str]):
+        """Write buffered files in the project's root directory and clear the buffer."""
+        if not files:
+            return
         try:
-            file_path = instruction.get("filename")
-            content = instruction.get("content")
-            console.print(f"[yellow]Configuring file: {file_path}...[/yellow]")
-            self.file_manager.create_file(file_path, content)
-            console.print("[green]File configured successfully![/green]")
+            summary = self.file_manager.write_files(files.items())
+            files.clear()
+            console.print(f"[green]Configured {summary['written']} files "
+                          f"({summary['unchanged']} unchanged, {summary['directories']} directories)[/green]")
         except Exception as e:
-            console.print(f"[red]Failed to configure file: {e}[/red]")
+            console.print(f"[red]Failed to configure files: {e}[/red]")
             raise
 
     def _update_settings(self, instruction: Dict):
@@ -109,18 +583,26 @@ class ProjectGenerator:
             console.print(f"[red]Failed to update settings: {e}[/red]")
             raise
 
+    def _include_urls(self, urls: List[List[str]], files: Dict[str, str]):
+        """Merge routes into the project's urls.py, as buffered or else as on disk."""
+        path = f"{self.name}/urls.py"
+        if path not in files:
+            files[path] = Path(self.file_manager.path(path)).read_text()
+        files[path] = include_urls(files[path], urls)
+
     def _install_dependencies(self, dependencies: List[str]):
-        """Install a dependencies using pip."""
-        failed_dependencies = list()
-        for dependency in dependencies:
-            console.print(f"[yellow]Installing dependency: {dependency}...[/yellow]")
-            try:
-                subprocess.check_call(["pip", "install", dependency])
-                console.print("[green]Dependency installed successfully![/green]")
-            except subprocess.CalledProcessError as e:
-                failed_dependencies.append({"name": dependency, "error": e})
-        if failed_dependencies:
-            # Refactor failed dependencies
-            console.print(f"[red]Failed dependency: {failed_dependencies}![/red]")
-            refactored_deps = self.api_client.refactor_dependencies(failed_dependencies)
-            self._install_dependencies(refactored_deps[0].get("dependencies"))
+        """Queue dependencies; they are installed together before the next command or at the end."""
+        self.dependencies.add(dependencies)
+
+    def _require_django(self):
+        """Queue Django itself: manage.py commands and validation need it, but Gemini never asks for it."""
+        self.dependencies.add(["django"])
+
+    def _install_pending_dependencies(self):
+        """Install all queued dependencies in one pip run."""
+        self.dependencies.install(self._refactor_dependencies)
+
+    def _refactor_dependencies(self, failed_dependencies: List[Dict[str, str]]) -> List[str]:
+        refactored = self.api_client.refactor_dependencies(failed_dependencies)
+        return [dependency for instruction in refactored if instruction.get("type") == "dependencies"
+                for dependency in instruction.get("dependencies", [])]
@@ -0,0 +1,98 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+JOURNAL_FILE = ".django-gen-journal.jsonl"
+JOURNAL_VERSION = 1
+
+
+class Journal:
+    """Append-only log of a generation run, kept in the project so it can be resumed.
+
+    Every entry is one JSON line, flushed and fsync'd before the run moves on:
+
+    - ``start``: the project name and generation options, written once the skeleton exists
+    - ``response``: the instructions of a job and the chat turns that produced them
+    - ``partial``: the instructions of a streamed job applied so far, written after every
+      command, since a stream is only journaled as a response once it is fully applied
+    - ``applied``: how many instructions of a job are on disk, written after every command
+      and at the end of each job
+    - ``finished``: the run completed
+
+    A line torn by a crash is ignored when the journal is loaded.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.project: Optional[str] = None
+        self.options: Dict = {}
+        self.responses: Dict[str, Dict] = {}
+        self.partial: Dict[str, List[Dict]] = {}
+        self.applied: Dict[str, int] = {}
+        self.finished = False
+        self._file = None
+
+    @classmethod
+    def load(cls, path: str) -> "Journal":
+        journal = cls(path)
+        lines = journal.path.read_text(encoding="utf-8").splitlines()
+        for number, line in enumerate(lines):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                if number == len(lines) - 1:
+                    break
+                raise ValueError(f"Corrupt journal entry on line {number + 1} of {journal.path}")
+            journal._apply(entry)
+        if journal.project is None:
+            raise ValueError(f"{journal.path} has no start entry")
+        # Progress on a response that was never journaled cannot be replayed
+        journal.applied = {key: count for key, count in journal.applied.items() if key in journal.responses}
+        return journal
+
+    def start(self, project: str, options: Dict):
+        self.record("start", version=JOURNAL_VERSION, project=project, options=options)
+
+    def response(self, key: str, instructions: List[Dict], turns: List[Dict]):
+        self.record("response", job=key, instructions=instructions, turns=turns)
+
+    def partial_response(self, key: str, instructions: List[Dict]):
+        self.record("partial", job=key, instructions=instructions)
+
+    def mark_applied(self, key: str, count: int):
+        if count > self.applied.get(key, 0):
+            self.record("applied", job=key, count=count)
+
+    def finish(self):
+        self.record("finished")
+
+    def record(self, event: str, **data):
+        entry = {"event": event, **data}
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._apply(entry)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _apply(self, entry: Dict):
+        event = entry.get("event")
+        if event == "start":
+            if entry.get("version") != JOURNAL_VERSION:
+                raise ValueError(f"Unsupported journal version: {entry.get('version')}")
+            self.project = entry["project"]
+            self.options = entry["options"]
+        elif event == "response":
+            self.responses[entry["job"]] = {"instructions": entry["instructions"], "turns": entry["turns"]}
+        elif event == "partial":
+            self.partial[entry["job"]] = entry["instructions"]
+        elif event == "applied":
+            self.applied[entry["job"]] = max(self.applied.get(entry["job"], 0), entry["count"])
+        elif event == "finished":
+            self.finished = True
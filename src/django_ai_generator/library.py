@@ -0,0 +1,170 @@
+import ast
+import json
+import os
+import re
+from pathlib import Path
+from string import Template
+from typing import Any, Dict, List, Optional
+
+LIBRARY_VERSION = 1
+LIBRARY_DIR = Path(__file__).resolve().parent / "library"
+
+# Words that say nothing about what an app or authentication setup should do
+_STOPWORDS = {"a", "an", "and", "the", "with", "for", "of", "to", "on", "by", "be", "is", "are", "it", "its",
+              "that", "this", "can", "should", "must", "i", "we", "my", "our", "want", "need", "use", "using",
+              "app", "application", "simple", "basic", "django", "rest", "framework", "drf", "create", "add",
+              "implement", "have", "has", "their", "them", "they", "all", "also", "each", "every"}
+
+
+def library_dirs() -> List[Path]:
+    """Return the directories library entries are read from, later ones taking precedence.
+
+    Besides the entries shipped with the package, ``DJANGO_GEN_LIBRARY_DIR`` may point to a
+    directory of team-specific entries.
+    """
+    directories = [LIBRARY_DIR]
+    if os.getenv("DJANGO_GEN_LIBRARY_DIR"):
+        directories.append(Path(os.getenv("DJANGO_GEN_LIBRARY_DIR")))
+    return directories
+
+
+def tokens(text: Optional[str]) -> set:
+    """Normalised content words of ``text``, with plural endings stripped."""
+    words = re.findall(r"[a-z0-9]+", (text or "").lower())
+    return {word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+            for word in words if word not in _STOPWORDS}
+
+
+class LibraryMatch:
+    """A library entry chosen for a request.
+
+    ``missing`` holds the words of the request the entry does not cover; when there are
+    any, the entry is only a starting point and Gemini is asked for the difference.
+    """
+
+    def __init__(self, entry: Dict, coverage: float, missing: List[str]):
+        self.entry = entry
+        self.coverage = coverage
+        self.missing = missing
+
+    @property
+    def exact(self) -> bool:
+        return not self.missing
+
+
+class InstructionLibrary:
+    """Versioned on-disk library of precomputed instruction sets.
+
+    Each entry is a JSON file describing an authentication setup, keyed by project type and
+    auth type, or a common app archetype. Requests are matched by how much of their
+    description the entry's keywords and description cover. Instructions use ``$app``,
+    ``$app_class`` and ``$project_name`` placeholders.
+    """
+
+    def __init__(self, directories: Optional[List[Path]] = None, threshold: float = 0.6):
+        self.directories = directories if directories is not None else library_dirs()
+        self.threshold = threshold
+        self.entries: Dict[str, Dict] = {}
+        for directory in self.directories:
+            for path in sorted(Path(directory).glob("*.json")):
+                entry = json.loads(path.read_text())
+                if entry.get("version") != LIBRARY_VERSION:
+                    continue
+                entry["vocabulary"] = tokens(" ".join(entry.get("keywords", [])) + " " + entry.get("description", ""))
+                self.entries[entry["name"]] = entry
+
+    def match_auth(self, project_type: str, auth_type: Optional[str],
+                   description: Optional[str]) -> Optional[LibraryMatch]:
+        """Return the entry for this project and auth type; any description it does not cover is the delta."""
+        for entry in self.entries.values():
+            if (entry["kind"] == "auth" and project_type in entry["project_types"]
+                    and entry.get("auth_type") == auth_type):
+                return self._score(entry, tokens(description))
+        return None
+
+    def match_app(self, project_type: str, app: Dict) -> Optional[LibraryMatch]:
+        """Return the archetype best covering the app's name and description, if it covers enough of it."""
+        words = tokens(f"{app['name'].replace('_', ' ')} {app.get('description')}")
+        if not words:
+            return None
+        best = None
+        for entry in self.entries.values():
+            if entry["kind"] == "app" and project_type in entry["project_types"]:
+                match = self._score(entry, words)
+                if best is None or match.coverage > best.coverage:
+                    best = match
+        return best if best is not None and best.coverage >= self.threshold else None
+
+    @staticmethod
+    def _score(entry: Dict, words: set) -> LibraryMatch:
+        missing = sorted(words - entry["vocabulary"])
+        coverage = 1 - len(missing) / len(words) if words else 1.0
+        return LibraryMatch(entry, coverage, missing)
+
+    def render(self, entry: Dict, app_name: str, project_name: str) -> List[Dict]:
+        """Return the entry's instructions for a concrete app and project.
+
+        The entry's routes are added to the project's urls.py by an ``include_urls``
+        instruction, which merges them into whatever ``urlpatterns`` earlier jobs left.
+        """
+        names = {"app": app_name, "app_class": "".join(part.capitalize() for part in app_name.split("_")),
+                 "project_name": project_name}
+        instructions = [self._substitute(instruction, names) for instruction in entry["instructions"]]
+        if entry.get("urls"):
+            instructions.append({"urls": self._substitute(entry["urls"], names), "type": "include_urls"})
+        return instructions
+
+    def _substitute(self, value: Any, names: Dict[str, str]) -> Any:
+        if isinstance(value, str):
+            return Template(value).safe_substitute(names)
+        if isinstance(value, list):
+            return [self._substitute(item, names) for item in value]
+        if isinstance(value, dict):
+            return {key: self._substitute(item, names) for key, item in value.items()}
+        return value
+
+
+def include_urls(content: str, urls: List[List[str]]) -> str:
+    """Add ``path(prefix, include(module))`` routes to a urls.py, skipping modules it already includes.
+
+    Routes go at the end of a literal ``urlpatterns`` list, or into an ``urlpatterns +=``
+    block when the list is built some other way, and ``include`` is imported if needed.
+    """
+    try:
+        tree = ast.parse(content)
+    except SyntaxError:
+        tree = ast.Module(body=[], type_ignores=[])
+    included = {node.args[0].value for node in ast.walk(tree)
+                if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "include"
+                and node.args and isinstance(node.args[0], ast.Constant)}
+    urls = [(prefix, module) for prefix, module in urls if module not in included]
+    if not urls:
+        return content
+    routes = "".join(f"    path('{prefix}', include('{module}')),\n" for prefix, module in urls)
+    lines = content.splitlines(keepends=True)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+
+    patterns = next((node.value for node in tree.body if isinstance(node, ast.Assign)
+                     and any(isinstance(target, ast.Name) and target.id == "urlpatterns" for target in node.targets)
+                     and isinstance(node.value, ast.List)), None)
+    if patterns is not None and patterns.end_lineno > patterns.lineno:
+        # Before the line holding the closing bracket
+        closing = patterns.end_lineno - 1
+        if patterns.elts and not lines[closing - 1].rstrip().endswith(","):
+            lines[closing - 1] = lines[closing - 1].rstrip("\n") + ",\n"
+        lines.insert(closing, routes)
+    else:
+        lines.append(f"\nurlpatterns += [\n{routes}]\n")
+
+    imported = {alias.asname or alias.name for node in tree.body if isinstance(node, ast.ImportFrom)
+                for alias in node.names}
+    if "include" not in imported or "path" not in imported:
+        url_import = next((node for node in tree.body if isinstance(node, ast.ImportFrom)
+                           and node.module == "django.urls" and node.lineno == node.end_lineno), None)
+        if url_import is not None:
+            names = sorted({alias.name for alias in url_import.names} | {"include", "path"})
+            lines[url_import.lineno - 1] = f"from django.urls import {', '.join(names)}\n"
+        else:
+            lines.insert(0, "from django.urls import include, path\n")
+    return "".join(lines)
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+MANIFEST_FILE = ".django-gen.json"
+MANIFEST_VERSION = 1
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+def input_hash(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class GenerationManifest:
+    """Record, stored in the project, of what every job was asked and what it produced.
+
+    For each job (the authentication app or a custom app) it keeps the inputs that went
+    into its prompt and their hash, the instructions Gemini returned and the hashes of the
+    files those instructions wrote. ``--update`` offers the stored inputs for editing and
+    only regenerates the jobs whose inputs changed.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.jobs: Dict[str, Dict] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "GenerationManifest":
+        manifest = cls(path)
+        data = json.loads(manifest.path.read_text())
+        if data.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported manifest version: {data.get('version')}")
+        manifest.jobs = data["jobs"]
+        return manifest
+
+    def record(self, key: str, inputs: Dict, instructions: List[Dict]):
+        files = {instruction["filename"]: content_hash(instruction.get("content"))
+                 for instruction in instructions if instruction.get("type") == "file"}
+        self.jobs[key] = {"hash": input_hash(inputs), "inputs": inputs, "instructions": instructions, "files": files}
+
+    def options(self) -> Dict:
+        """Rebuild the generation options (type, authentication and apps) from the stored job inputs."""
+        options = {"apps": []}
+        for key, job in self.jobs.items():
+            inputs = job.get("inputs")
+            if inputs is None:
+                raise ValueError(f"{self.path} does not store the inputs of {key}, regenerate the project first")
+            options["type"] = inputs["type"]
+            if key == "authentication":
+                options.update(authentication=True, auth_type=inputs.get("auth_type"),
+                               auth_prompt=inputs.get("auth_prompt"))
+            else:
+                options["apps"].append(inputs["app"])
+        return options
+
+    def remove(self, key: str):
+        self.jobs.pop(key, None)
+
+    def save(self):
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps({"version": MANIFEST_VERSION, "jobs": self.jobs}, indent=2))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,212 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Required fields and their types for every instruction type
+INSTRUCTION_SCHEMA = {
+    "file": {"filename": str, "content": str},
+    "command": {"command": str},
+    "update_settings": {"variable_name": str},
+    "dependencies": {"dependencies": list},
+    "include_urls": {"urls": list},
+}
+SETTINGS_ACTIONS = {None, "set", "add", "remove"}
+_FENCE_RE = re.compile(r"```[\w-]*")
+
+
+class ParsedResponse:
+    """Instructions recovered from a model response.
+
+    ``truncated`` is set when the text ended before the instruction array was closed;
+    ``instructions`` then holds every complete instruction before the cut. Instructions
+    that could not be decoded or failed validation are described in ``errors``.
+    """
+
+    def __init__(self):
+        self.instructions: List[Dict] = []
+        self.errors: List[str] = []
+        self.truncated = False
+        self.found = False
+
+
+def load_object(text: str) -> Any:
+    """Decode one JSON value, tolerating raw control characters inside strings and trailing commas."""
+    try:
+        return json.loads(text, strict=False)
+    except json.JSONDecodeError:
+        return json.loads(_strip_trailing_commas(text), strict=False)
+
+
+def _strip_trailing_commas(text: str) -> str:
+    kept = []
+    comma = None
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char in "}]" and comma is not None:
+            kept[comma] = ""
+        elif char == ",":
+            comma = len(kept)
+            kept.append(char)
+            continue
+        elif char == '"':
+            in_string = True
+        if not char.isspace():
+            comma = None
+        kept.append(char)
+    return "".join(kept)
+
+
+def validate_instruction(instruction: Any) -> Optional[str]:
+    """Return why ``instruction`` does not match its schema, or None if it does."""
+    if not isinstance(instruction, dict):
+        return f"expected an object, got {type(instruction).__name__}"
+    kind = instruction.get("type")
+    if kind not in INSTRUCTION_SCHEMA:
+        return f"unknown instruction type {kind!r}"
+    for field, field_type in INSTRUCTION_SCHEMA[kind].items():
+        if not isinstance(instruction.get(field), field_type):
+            return f"{kind} instruction needs a {field_type.__name__} '{field}'"
+    if kind == "dependencies" and not all(isinstance(name, str) for name in instruction["dependencies"]):
+        return "dependencies must be package names"
+    if kind == "update_settings":
+        if "value" not in instruction:
+            return "update_settings instruction needs a 'value'"
+        if instruction.get("action") not in SETTINGS_ACTIONS:
+            return f"unknown settings action {instruction.get('action')!r}"
+    return None
+
+
+def opens_instructions(text: str, position: int) -> Optional[bool]:
+    """Whether the bracket at ``position`` opens the instructions rather than being part of prose.
+
+    An array must start with an object or be empty (``[{`` or ``[]``) and a bare object
+    with a key (``{"``). None means the text ends before this can be told.
+    """
+    allowed = "{]" if text[position] == "[" else '"}'
+    for char in text[position + 1:]:
+        if not char.isspace():
+            return char in allowed
+    return None
+
+
+def is_prose(text: str) -> bool:
+    """Whether ``text`` has anything besides whitespace and code fences."""
+    return bool(_FENCE_RE.sub("", text).strip())
+
+
+def parse_instructions(text: str) -> ParsedResponse:
+    """Extract the instruction array from a model response.
+
+    Prose and code fences around the array are ignored, and a bare object that is the
+    whole answer is treated as an array of one. Brackets and objects in the prose, such
+    as ``INSTALLED_APPS[0]`` or a settings dict, are skipped, and so is any array without
+    a valid instruction, except for an empty array that is the answer itself. Each
+    top-level object is decoded on its own, so one broken object does not discard the
+    others.
+    """
+    position = 0
+    while True:
+        start = _find_start(text, position)
+        if start is None:
+            return ParsedResponse()
+        result, end = _parse_from(text, start)
+        if result.truncated or accepts_candidate(len(result.instructions), len(result.errors), text[:start],
+                                                 text[end + 1:] if text[start] == "{" else None):
+            return result
+        position = end + 1
+
+
+def accepts_candidate(instructions: int, errors: int, before: str, after: Optional[str] = None) -> bool:
+    """Whether a closed candidate is the answer rather than part of prose, given its valid and invalid objects.
+
+    ``after`` is the text after a bare object, None for an array. A candidate must hold a
+    valid instruction, or be an empty array with nothing but fences before it; a bare
+    object must also be the only thing besides fences in the response.
+    """
+    if after is not None:
+        return instructions > 0 and not is_prose(before) and not is_prose(after)
+    return instructions > 0 or (not errors and not is_prose(before))
+
+
+def _find_start(text: str, position: int) -> Optional[int]:
+    for index in range(position, len(text)):
+        # A bracket at the very end is a truncated response, not prose
+        if text[index] in "[{" and opens_instructions(text, index) is not False:
+            return index
+    return None
+
+
+def _parse_from(text: str, start: int):
+    """Parse the array or bare object starting at ``start``; return the result and where it ended."""
+    result = ParsedResponse()
+    result.found = True
+    bare_object = text[start] == "{"
+    depth = 1 if bare_object else 0
+    object_start = start if bare_object else None
+    in_string = escaped = False
+    for position in range(start + 1, len(text)):
+        char = text[position]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            if depth == 0:
+                object_start = position
+            depth += 1
+        elif char in "}]":
+            if depth == 0:
+                # Closing bracket of the top-level array
+                return result, position
+            depth -= 1
+            if depth == 0:
+                _add_instruction(result, text[object_start:position + 1])
+                object_start = None
+                if bare_object:
+                    return result, position
+    result.truncated = True
+    return result, len(text)
+
+
+def _add_instruction(result: ParsedResponse, text: str):
+    instruction, error = load_instruction(text)
+    if error:
+        result.errors.append(error)
+    else:
+        result.instructions.append(instruction)
+
+
+def load_instruction(text: str) -> Tuple[Optional[Dict], Optional[str]]:
+    """Decode and validate one instruction object; return it, or why it was rejected."""
+    try:
+        instruction = load_object(text)
+    except json.JSONDecodeError as e:
+        return None, f"undecodable instruction: {e}"
+    error = validate_instruction(instruction)
+    return (None, error) if error else (instruction, None)
+
+
+def describe_instruction(instruction: Dict) -> str:
+    """Short human-readable description of an instruction, e.g. for prompts and logs."""
+    kind = instruction.get("type")
+    if kind == "file":
+        return f"the file {instruction['filename']}"
+    if kind == "command":
+        return f"the command `{instruction['command']}`"
+    if kind == "update_settings":
+        return f"the setting {instruction['variable_name']}"
+    if kind == "include_urls":
+        return f"the routes {', '.join(prefix for prefix, _ in instruction['urls'])}"
+    return f"the dependencies {', '.join(instruction['dependencies'])}"
@@ -0,0 +1,117 @@
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from rich.console import Console
+
+console = Console()
+
+PLAN_VERSION = 1
+
+_SETUP_COMMAND_RE = re.compile(r"\b(startapp|startproject)\b|^\s*mkdir\b")
+
+
+class Plan:
+    """All instructions for a project, compiled into one executable plan.
+
+    Files written more than once keep only the last content, settings edits are coalesced
+    per variable, dependencies and URL routes are merged and duplicate commands dropped.
+    Execution order is dependencies, skeleton commands (``startapp`` and friends), files,
+    settings, URL routes and then the remaining commands. A plan can be saved as JSON and
+    replayed without any API calls.
+    """
+
+    def __init__(self, project: str, options: Optional[Dict] = None):
+        self.project = project
+        self.options = options or {}
+        self.dependencies: List[str] = []
+        self.setup_commands: List[str] = []
+        self.files: Dict[str, str] = {}
+        self.settings: Dict[str, List[Dict]] = {}
+        self.urls: List[List[str]] = []
+        self.commands: List[str] = []
+
+    def add(self, instructions):
+        for instruction in instructions:
+            kind = instruction.get("type")
+            if kind == "file":
+                # Last writer wins, but the file keeps its place in the plan
+                self.files[instruction.get("filename")] = instruction.get("content")
+            elif kind == "update_settings":
+                self._add_setting(instruction.get("variable_name"), instruction.get("value"),
+                                  instruction.get("action"))
+            elif kind == "include_urls":
+                for route in instruction.get("urls") or []:
+                    if list(route) not in self.urls:
+                        self.urls.append(list(route))
+            elif kind == "dependencies":
+                for dependency in instruction.get("dependencies") or []:
+                    if dependency not in self.dependencies:
+                        self.dependencies.append(dependency)
+            elif kind == "command":
+                command = instruction.get("command")
+                commands = self.setup_commands if _SETUP_COMMAND_RE.search(command) else self.commands
+                if command not in commands:
+                    commands.append(command)
+
+    def _add_setting(self, variable_name: str, value, action: Optional[str]):
+        edits = self.settings.setdefault(variable_name, [])
+        if action is None or action == "set":
+            # A set overrides everything done to the variable before it
+            edits[:] = [{"value": value, "action": "set"}]
+            return
+        opposite = "remove" if action == "add" else "add"
+        edits[:] = [edit for edit in edits if not (edit["action"] in (action, opposite) and edit["value"] == value)]
+        edits.append({"value": value, "action": action})
+
+    def instructions(self) -> List[Dict]:
+        """Return the plan as a flat list of instructions in execution order."""
+        instructions = []
+        if self.dependencies:
+            instructions.append({"dependencies": list(self.dependencies), "type": "dependencies"})
+        instructions += [{"command": command, "type": "command"} for command in self.setup_commands]
+        instructions += [{"filename": filename, "content": content, "type": "file"}
+                         for filename, content in self.files.items()]
+        instructions += [{"variable_name": variable_name, "value": edit["value"], "action": edit["action"],
+                          "type": "update_settings"}
+                         for variable_name, edits in self.settings.items() for edit in edits]
+        if self.urls:
+            instructions.append({"urls": list(self.urls), "type": "include_urls"})
+        instructions += [{"command": command, "type": "command"} for command in self.commands]
+        return instructions
+
+    def to_dict(self) -> Dict:
+        return {"version": PLAN_VERSION, "project": self.project, "options": self.options,
+                "instructions": self.instructions()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Plan":
+        if data.get("version") != PLAN_VERSION:
+            raise ValueError(f"Unsupported plan version: {data.get('version')}")
+        plan = cls(data["project"], data.get("options"))
+        plan.add(data["instructions"])
+        return plan
+
+    def save(self, path: str):
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2))
+
+    @classmethod
+    def load(cls, path: str) -> "Plan":
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+    def print(self):
+        console.print(f"[bold]Plan for {self.project}[/bold]")
+        if self.dependencies:
+            console.print(f"[blue]Dependencies:[/blue] {', '.join(self.dependencies)}")
+        for command in self.setup_commands:
+            console.print(f"[yellow]Command:[/yellow] {command}")
+        for filename, content in self.files.items():
+            console.print(f"[green]File:[/green] {filename} ({len(content or '')} bytes)")
+        for variable_name, edits in self.settings.items():
+            for edit in edits:
+                console.print(f"[magenta]Setting:[/magenta] {variable_name} {edit['action']} {edit['value']!r}")
+        for prefix, module in self.urls:
+            console.print(f"[cyan]Route:[/cyan] {prefix} -> {module}")
+        for command in self.commands:
+            console.print(f"[yellow]Command:[/yellow] {command}")
@@ -0,0 +1,73 @@
+import threading
+from typing import Dict, List, Optional
+
+# Candidate models per request kind, most preferred first
+DEFAULT_MODELS = {
+    "auth": ["gemini-exp-1114"],
+    "app": ["gemini-exp-1114"],
+    "refactor": ["gemini-1.5-flash-latest"],
+    # Repairs rewrite generated app code, so they get the app model
+    "repair": ["gemini-exp-1114"],
+    "project": ["gemini-1.5-flash-latest"],
+}
+
+# Latency charged to a model for a failed call, in seconds
+FAILURE_PENALTY = 60.0
+
+
+def parse_model_routes(values: List[str]) -> Dict[str, List[str]]:
+    """Parse ``KIND=MODEL[,MODEL...]`` strings into a routing table."""
+    routes = {}
+    for value in values:
+        kind, sep, models = value.partition("=")
+        kind = kind.strip()
+        if not sep or kind not in DEFAULT_MODELS:
+            raise ValueError(f"Invalid model route '{value}', expected KIND=MODEL[,MODEL...] "
+                             f"with KIND one of {', '.join(DEFAULT_MODELS)}")
+        routes[kind] = [model.strip() for model in models.split(",") if model.strip()]
+        if not routes[kind]:
+            raise ValueError(f"No models given for '{kind}'")
+    return routes
+
+
+class ModelRouter:
+    """Chooses which Gemini model serves each kind of request.
+
+    Every kind (``auth``, ``app``, ``refactor``, ``repair``, ``project``) has a list of
+    candidate models; ``repair`` follows ``app`` unless it is configured itself.
+    The router keeps an exponentially weighted moving average of each model's latency,
+    with failures counted as ``FAILURE_PENALTY``, and ranks candidates by it. Models that
+    have not answered yet rank first, in configured order, so each gets measured once.
+    Shared by a client and its forks, so it is thread-safe.
+    """
+
+    def __init__(self, models: Optional[Dict[str, List[str]]] = None, alpha: float = 0.3):
+        models = models or {}
+        self.models = {**DEFAULT_MODELS, **models}
+        if "repair" not in models:
+            self.models["repair"] = self.models["app"]
+        self.alpha = alpha
+        self.latency: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def candidates(self, kind: str) -> List[str]:
+        """Return the models for ``kind``, fastest first."""
+        models = self.models[kind]
+        with self._lock:
+            return sorted(models, key=lambda model: (model in self.latency, self.latency.get(model, 0.0),
+                                                     models.index(model)))
+
+    def choose(self, kind: str) -> str:
+        return self.candidates(kind)[0]
+
+    def route_key(self, kind: str) -> str:
+        """Identify the route independently of the model chosen, e.g. for response caching."""
+        return ",".join(self.models[kind])
+
+    def record(self, model: str, latency: float, ok: bool = True):
+        if not ok:
+            latency = max(latency, FAILURE_PENALTY)
+        with self._lock:
+            previous = self.latency.get(model)
+            self.latency[model] = latency if previous is None else (
+                self.alpha * latency + (1 - self.alpha) * previous)
@@ -0,0 +1,142 @@
+import ast
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_UNSET = object()
+
+
+def format_value(value: Any) -> str:
+    """Render a Python value as settings.py source."""
+    if isinstance(value, str):
+        return repr(value)
+    return str(value)
+
+
+class SettingsDocument:
+    """In-memory model of a settings.py file.
+
+    The file is parsed once into text segments, one per top-level ``NAME = value``
+    assignment plus the untouched text between them. Edits replace segments in memory and
+    ``flush`` writes the file back atomically, only if something changed.
+    """
+
+    def __init__(self, path: Path, content: Optional[str] = None):
+        self.path = Path(path)
+        self._segments: List[List] = []
+        self._index: Dict[str, int] = {}
+        self._values: Dict[str, Any] = {}
+        self.dirty = False
+        self._parse(self.path.read_text() if content is None else content)
+        self._stat = self._current_stat()
+
+    def _current_stat(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def is_stale(self) -> bool:
+        """Return True if the file changed on disk since it was parsed or last flushed."""
+        return self._current_stat() != self._stat
+
+    def _parse(self, content: str):
+        tree = ast.parse(content)
+        lines = content.splitlines(keepends=True)
+        position = 0
+        previous_end = 0
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                name, value = node.targets[0].id, node.value
+            elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name) and node.value is not None:
+                name, value = node.target.id, node.value
+            else:
+                previous_end = node.end_lineno
+                continue
+            if node.lineno <= previous_end:
+                # Shares a line with the previous statement, leave it as plain text
+                previous_end = node.end_lineno
+                continue
+            previous_end = node.end_lineno
+
+            start = node.lineno - 1
+            if start > position:
+                self._segments.append([None, "".join(lines[position:start])])
+            last_line = lines[node.end_lineno - 1]
+            # end_col_offset counts UTF-8 bytes, keep trailing comments and the newline
+            tail = last_line.encode("utf-8")[node.end_col_offset:].decode("utf-8")
+            self._values.pop(name, None)
+            self._index[name] = len(self._segments)
+            self._segments.append([name, "".join(lines[start:node.end_lineno - 1]) + last_line, tail, value])
+            position = node.end_lineno
+        if position < len(lines):
+            self._segments.append([None, "".join(lines[position:])])
+
+    def render(self) -> str:
+        return "".join(segment[1] for segment in self._segments)
+
+    def get(self, variable_name: str) -> Any:
+        """Return the literal value of a setting, raising KeyError if it is not assigned."""
+        if variable_name not in self._index:
+            raise KeyError(variable_name)
+        value = self._values.get(variable_name, _UNSET)
+        if value is _UNSET:
+            node = self._segments[self._index[variable_name]][3]
+            try:
+                value = ast.literal_eval(node)
+            except (SyntaxError, ValueError):
+                raise ValueError(f"Could not parse existing value for {variable_name}")
+            self._values[variable_name] = value
+        return value
+
+    def set(self, variable_name: str, value: Any):
+        source = f"{variable_name} = {format_value(value)}"
+        if variable_name in self._index:
+            segment = self._segments[self._index[variable_name]]
+            segment[1] = source + segment[2]
+        else:
+            if self._segments and not self._segments[-1][1].endswith("\n"):
+                self._segments[-1][1] += "\n"
+            self._index[variable_name] = len(self._segments)
+            self._segments.append([variable_name, source + "\n", "\n", None])
+        self._values[variable_name] = value
+        self.dirty = True
+
+    def update(self, variable_name: str, value: Any, operation_type: Optional[str] = None):
+        """Apply a set, add or remove edit the way update_settings instructions describe it."""
+        if operation_type is None or operation_type == "set":
+            self.set(variable_name, value)
+            return
+
+        if variable_name not in self._index:
+            raise ValueError(f"Cannot {operation_type} from non-existent variable {variable_name}")
+        current_value = self.get(variable_name)
+        if not isinstance(current_value, (list, tuple, set)):
+            raise TypeError(f"{variable_name} must be a list, tuple, or set for add/remove operations")
+
+        items = list(current_value)
+        if operation_type == "add" and value not in items:
+            items.append(value)
+        elif operation_type == "remove" and value in items:
+            items.remove(value)
+        else:
+            return
+        self.set(variable_name, type(current_value)(items))
+
+    def flush(self):
+        """Write pending edits to disk atomically."""
+        if not self.dirty:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".settings.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.render())
+            os.chmod(tmp_path, self.path.stat().st_mode & 0o777)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.dirty = False
+        self._stat = self._current_stat()
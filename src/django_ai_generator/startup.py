@@ -0,0 +1,66 @@
+import builtins
+import importlib.util
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# Taken when the CLI starts importing; the CLI imports this module first
+STARTED = time.perf_counter()
+_marks: List[Tuple[str, float]] = []
+
+
+def mark(name: str):
+    """Record that startup reached ``name``, for ``--profile-startup``."""
+    _marks.append((name, time.perf_counter()))
+
+
+class ImportProfiler:
+    """Times the imports done through ``import`` statements, for ``--profile-startup``.
+
+    Times are cumulative, a module's time including the modules it imports itself, like
+    the second column of ``python -X importtime``.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._original_import = None
+
+    def start(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def stop(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module = name
+        if level:
+            try:
+                module = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+            except (ImportError, ValueError):
+                pass
+        if module in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self.timings.setdefault(module, time.perf_counter() - start)
+
+    def report(self, limit: int = 15):
+        """Print the startup milestones and the slowest imports since ``start``."""
+        self.stop()
+        mark("exit")
+        from rich.console import Console
+        from rich.table import Table
+
+        console = Console(stderr=True)
+        console.print(" ".join(f"{name}: {(at - STARTED) * 1000:.0f}ms" for name, at in _marks))
+        table = Table(title="Slowest imports after startup")
+        table.add_column("Module")
+        table.add_column("Cumulative", justify="right")
+        for module, seconds in sorted(self.timings.items(), key=lambda item: item[1], reverse=True)[:limit]:
+            table.add_row(module, f"{seconds * 1000:.1f}ms")
+        console.print(table)
@@ -0,0 +1,130 @@
+from typing import Dict, List, Optional
+
+from .parsing import accepts_candidate, is_prose, load_instruction, opens_instructions
+
+
+class InstructionStreamParser:
+    """Incremental parser for a JSON array of instruction objects.
+
+    Text is fed in arbitrary chunks; every valid instruction object is returned as soon as
+    its closing brace arrives. Candidates are judged like ``parse_instructions`` judges
+    them: anything before the array, such as a code fence, is ignored, brackets and objects
+    in prose are skipped, and so is an array that turns out to hold no valid instruction.
+    A bare object can only be known to be the whole answer once the text has ended, so it
+    is returned by ``finish``. Objects that are undecodable or fail validation are skipped
+    and described in ``errors``.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._position = 0
+        self._object_start = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        # Text skipped before the current candidate, and what the candidate held so far
+        self._prefix = ""
+        self._bare = False
+        self._instructions = 0
+        self._errors: List[str] = []
+        # A bare object that is the answer if nothing but fences follows it
+        self._held: Optional[Dict] = None
+        self._after_held = ""
+        self.started = False
+        self.finished = False
+        self.errors: List[str] = []
+
+    def feed(self, text: str) -> List[Dict]:
+        """Consume a chunk of text and return the instructions completed by it."""
+        self._buffer += text
+        completed = []
+        buffer = self._buffer
+        position = self._position
+        while position < len(buffer) and not self.finished:
+            char = buffer[position]
+            if not self.started:
+                if char in "[{":
+                    opens = opens_instructions(buffer, position)
+                    if opens is None:
+                        # Wait for the next chunk to tell
+                        break
+                    if opens:
+                        self._start(char == "{", position)
+                if not self.started:
+                    self._prefix += char
+                    if self._held is not None:
+                        self._after_held += char
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._object_start = position
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # Closing bracket of the top-level array
+                    self._close_candidate()
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        instruction, error = load_instruction(buffer[self._object_start:position + 1])
+                        self._object_start = None
+                        if self._bare:
+                            self._close_bare(instruction, error)
+                        elif error:
+                            self._errors.append(error)
+                        else:
+                            self._instructions += 1
+                            completed.append(instruction)
+            position += 1
+
+        # Drop text that can no longer be part of an object
+        keep_from = self._object_start if self._object_start is not None else position
+        self._buffer = buffer[keep_from:]
+        self._position = position - keep_from
+        if self._object_start is not None:
+            self._object_start = 0
+        return completed
+
+    def finish(self) -> List[Dict]:
+        """Call once the text has ended; return the bare object if it turned out to be the whole answer."""
+        if self._held is None or self.started or is_prose(self._after_held):
+            return []
+        self.started = self.finished = True
+        return [self._held]
+
+    def _start(self, bare: bool, position: int):
+        self.started = True
+        self._bare = bare
+        self._instructions = 0
+        self._errors = []
+        self._held = None
+        if bare:
+            self._depth = 1
+            self._object_start = position
+
+    def _close_candidate(self):
+        if accepts_candidate(self._instructions, len(self._errors), self._prefix):
+            self.finished = True
+            self.errors.extend(self._errors)
+        else:
+            self._reject()
+
+    def _close_bare(self, instruction: Optional[Dict], error: Optional[str]):
+        held = instruction if accepts_candidate(0 if error else 1, 0, self._prefix, "") else None
+        self._reject()
+        self._held = held
+        self._after_held = ""
+
+    def _reject(self):
+        """Treat the candidate as prose and keep scanning after it."""
+        self.started = False
+        self._depth = 0
+        self._prefix += "[]"
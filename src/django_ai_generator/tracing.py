@@ -0,0 +1,70 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+
+class Tracer:
+    """Collects timed spans and exports them as a Chrome trace (chrome://tracing, Perfetto).
+
+    Spans carry a category (``api``, ``instruction``, ``pip``, ``command``, ``files``,
+    ``settings``, ``job``) and free-form args such as retries or token counts.
+    """
+
+    def __init__(self):
+        self.events: List[Dict] = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, category: str, **args):
+        """Time the enclosed block; the yielded dict can be filled with extra args."""
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.record(name, category, start, time.perf_counter() - start, **args)
+
+    def record(self, name: str, category: str, start: float, duration: float, **args):
+        """Record a span measured by the caller, ``start`` being a ``time.perf_counter()`` value."""
+        event = {"name": name, "cat": category, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                 "ts": round((start - self._origin) * 1e6), "dur": round(duration * 1e6),
+                 "args": {key: value for key, value in args.items() if value is not None}}
+        with self._lock:
+            self.events.append(event)
+
+    def summary(self) -> List[Dict]:
+        """Aggregate spans by category and name."""
+        groups = {}
+        for event in self.events:
+            group = groups.setdefault((event["cat"], event["name"]),
+                                      {"category": event["cat"], "name": event["name"],
+                                       "count": 0, "total": 0.0, "max": 0.0})
+            seconds = event["dur"] / 1e6
+            group["count"] += 1
+            group["total"] += seconds
+            group["max"] = max(group["max"], seconds)
+        return sorted(groups.values(), key=lambda group: group["total"], reverse=True)
+
+    def write(self, path: str):
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms", "summary": self.summary()}, f)
+
+    def print_summary(self, title: Optional[str] = "Run summary"):
+        table = Table(title=title)
+        for column in ("Category", "Span", "Count", "Total", "Mean", "Max"):
+            table.add_column(column, justify="left" if column in ("Category", "Span") else "right")
+        for group in self.summary():
+            table.add_row(group["category"], group["name"], str(group["count"]), f"{group['total']:.2f}s",
+                          f"{group['total'] / group['count']:.2f}s", f"{group['max']:.2f}s")
+        console.print(table)
+
+
+tracer = Tracer()
@@ -0,0 +1,271 @@
+import ast
+import functools
+import importlib
+import importlib.util
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+# Directories that hold tooling or installed packages rather than project code
+_SKIPPED_DIRECTORIES = {"__pycache__", "node_modules", "venv", "env", "site-packages"}
+_TRY_NODES = tuple(getattr(ast, name) for name in ("Try", "TryStar") if hasattr(ast, name))
+# Below this many changed files, starting worker processes costs more than parsing
+PARALLEL_THRESHOLD = 64
+
+
+class SourceModule:
+    """What validation needs to know about one ``.py`` file of the project."""
+
+    def __init__(self, path: str, name: Optional[str]):
+        self.path = path
+        # Dotted module name, None if the path cannot be imported
+        self.name = name
+        self.error: Optional[str] = None
+        # (line, module, imported names, whether it runs when the module is imported); imports
+        # inside try blocks are left out, failing is what the try is for
+        self.imports: List[Tuple[int, str, List[str], bool]] = []
+        self.names: Set[str] = set()
+        # Any name may exist: ``import *`` or a module-level ``__getattr__``
+        self.open_namespace = False
+        self.includes: List[Tuple[int, str]] = []
+        self.installed_apps: List[Tuple[int, str]] = []
+
+    @property
+    def package(self) -> str:
+        """The package relative imports in this module are resolved against."""
+        if self.path.endswith("__init__.py"):
+            return self.name or ""
+        return (self.name or "").rpartition(".")[0]
+
+
+def module_name(path: str) -> Optional[str]:
+    """Dotted module name of a project-relative ``.py`` path, or None if it cannot be imported."""
+    parts = path[:-len(".py")].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    if not parts or not all(part.isidentifier() for part in parts):
+        return None
+    return ".".join(parts)
+
+
+def resolve_import(module: Optional[str], level: int, package: str) -> Optional[str]:
+    """Absolute name of a ``from`` import, or None for a relative import beyond the top-level package."""
+    if not level:
+        return module
+    parts = package.split(".") if package else []
+    if level > len(parts):
+        return None
+    base = parts[:len(parts) - level + 1]
+    return ".".join(base + [module] if module else base)
+
+
+def scan_module(root: str, path: str) -> SourceModule:
+    """Parse one file and collect its imports, top-level names, ``include()`` targets and INSTALLED_APPS."""
+    module = SourceModule(path, module_name(path))
+    try:
+        with open(os.path.join(root, path), encoding="utf-8") as f:
+            source = f.read()
+        tree = ast.parse(source, filename=path)
+    except SyntaxError as e:
+        module.error = f"line {e.lineno}: {e.msg}"
+        return module
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        module.error = str(e)
+        return module
+    _collect(tree.body, module, top_level=True, eager=True, guarded=False)
+    if "include" not in source:
+        return module
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and _is_include(node.func) and node.args:
+            target = node.args[0]
+            if isinstance(target, ast.Tuple) and target.elts:
+                target = target.elts[0]
+            if isinstance(target, ast.Constant) and isinstance(target.value, str):
+                module.includes.append((node.lineno, target.value))
+    return module
+
+
+def _is_include(func: ast.expr) -> bool:
+    return (isinstance(func, ast.Name) and func.id == "include") or \
+        (isinstance(func, ast.Attribute) and func.attr == "include")
+
+
+def _collect(body: List[ast.stmt], module: SourceModule, top_level: bool, eager: bool, guarded: bool):
+    """Walk statements; ``eager`` is whether they run on import, ``guarded`` whether they are inside a try."""
+    for node in body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if not guarded:
+                    module.imports.append((node.lineno, alias.name, [], eager))
+                if top_level:
+                    module.names.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, ast.ImportFrom):
+            target = resolve_import(node.module, node.level, module.package)
+            if target is None:
+                module.error = f"line {node.lineno}: attempted relative import beyond top-level package"
+                continue
+            names = [alias.name for alias in node.names if alias.name != "*"]
+            if not guarded:
+                module.imports.append((node.lineno, target, names, eager))
+            if top_level:
+                module.names.update(alias.asname or alias.name for alias in node.names if alias.name != "*")
+                module.open_namespace = module.open_namespace or len(names) < len(node.names)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if top_level:
+                module.names.add(node.name)
+                module.open_namespace = module.open_namespace or node.name == "__getattr__"
+            _collect(node.body, module, top_level=False, eager=False, guarded=guarded)
+        elif isinstance(node, ast.ClassDef):
+            if top_level:
+                module.names.add(node.name)
+            _collect(node.body, module, top_level=False, eager=eager, guarded=guarded)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                for name in ast.walk(target):
+                    if isinstance(name, ast.Name) and top_level:
+                        module.names.add(name.id)
+                        if name.id == "INSTALLED_APPS" and isinstance(node.value, (ast.List, ast.Tuple)):
+                            module.installed_apps += [(element.lineno, element.value) for element in node.value.elts
+                                                      if isinstance(element, ast.Constant)
+                                                      and isinstance(element.value, str)]
+        elif isinstance(node, _TRY_NODES):
+            for block in [node.body, node.orelse, node.finalbody] + [handler.body for handler in node.handlers]:
+                _collect(block, module, top_level, eager, guarded=True)
+        else:
+            for field in ("body", "orelse"):
+                block = getattr(node, field, None)
+                if isinstance(block, list) and block and isinstance(block[0], ast.stmt):
+                    _collect(block, module, top_level, eager, guarded)
+
+
+class ProjectValidator:
+    """Statically checks the Python files of a generated project, without importing it or starting Django.
+
+    Every ``.py`` file is parsed, again only once it changed, and the project is checked
+    for:
+
+    - files that do not parse
+    - imports of project modules that do not resolve to a module or to a name it defines,
+      and imports of other packages that are not installed
+    - INSTALLED_APPS entries and urls ``include()`` targets that do not exist
+    - module-level ``from`` imports between project modules that form a cycle
+
+    ``validate`` returns the problems per file, relative to the project root. Parsing is
+    CPU-bound, so many changed files are parsed in worker processes rather than threads.
+    """
+
+    def __init__(self, root: str, max_workers: Optional[int] = None):
+        self.root = root
+        self.max_workers = max_workers
+        self._modules: Dict[str, SourceModule] = {}
+        self._stats: Dict[str, Tuple[int, int]] = {}
+        self._installed: Set[str] = set()
+
+    def validate(self) -> Dict[str, List[str]]:
+        files = self._python_files()
+        for path in set(self._modules) - set(files):
+            del self._modules[path], self._stats[path]
+        changed = [path for path, stat in files.items() if self._stats.get(path) != stat]
+        for module in self._scan(changed):
+            self._modules[module.path] = module
+            self._stats[module.path] = files[module.path]
+        # Packages may have been installed since the last validation
+        importlib.invalidate_caches()
+
+        modules = {module.name: module for module in self._modules.values() if module.name}
+        # Directories count as (namespace) packages, like they do for the import system
+        packages = {".".join(name.split(".")[:depth]) for name in modules for depth in range(1, name.count(".") + 2)}
+        top_level = {name.split(".")[0] for name in packages}
+
+        def exists(name: str) -> bool:
+            if name.split(".")[0] in top_level:
+                return name in packages
+            return self._is_installed(name.split(".")[0])
+
+        problems: Dict[str, List[str]] = {}
+        for path in sorted(self._modules):
+            module = self._modules[path]
+            found = problems.setdefault(path, [])
+            if module.error:
+                found.append(module.error)
+                continue
+            for line, target, names, _ in module.imports:
+                if not exists(target):
+                    found.append(f"line {line}: no module named {target!r}")
+                elif target in modules and not modules[target].error and not modules[target].open_namespace:
+                    missing = [name for name in names
+                               if name not in modules[target].names and f"{target}.{name}" not in packages]
+                    found += [f"line {line}: cannot import name {name!r} from {target!r}" for name in missing]
+                elif target.split(".")[0] in top_level and target not in modules:
+                    # A package without __init__.py only has submodules
+                    found += [f"line {line}: cannot import name {name!r} from {target!r}"
+                              for name in names if f"{target}.{name}" not in packages]
+            for line, target in module.includes:
+                if not exists(target):
+                    found.append(f"line {line}: include() of missing module {target!r}")
+            for line, app in module.installed_apps:
+                if not (exists(app) or self._is_app_config(app, modules)):
+                    found.append(f"line {line}: INSTALLED_APPS entry {app!r} does not exist")
+        self._check_cycles(modules, problems)
+        return {path: found for path, found in problems.items() if found}
+
+    def _scan(self, paths: List[str]) -> List[SourceModule]:
+        scan = functools.partial(scan_module, self.root)
+        workers = min(self.max_workers or os.cpu_count() or 1, len(paths) // (PARALLEL_THRESHOLD // 2))
+        if len(paths) < PARALLEL_THRESHOLD or workers < 2:
+            return [scan(path) for path in paths]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(scan, paths, chunksize=16))
+
+    def _python_files(self) -> Dict[str, Tuple[int, int]]:
+        files = {}
+        for directory, subdirectories, filenames in os.walk(self.root):
+            subdirectories[:] = [name for name in subdirectories
+                                 if name not in _SKIPPED_DIRECTORIES and not name.startswith(".")]
+            for filename in filenames:
+                if filename.endswith(".py"):
+                    full_path = os.path.join(directory, filename)
+                    stat = os.stat(full_path)
+                    path = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+                    files[path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def _is_installed(self, package: str) -> bool:
+        if package not in self._installed:
+            try:
+                if importlib.util.find_spec(package) is None:
+                    return False
+            except (ImportError, ValueError):
+                return False
+            self._installed.add(package)
+        return True
+
+    @staticmethod
+    def _is_app_config(app: str, modules: Dict[str, SourceModule]) -> bool:
+        """Whether an INSTALLED_APPS entry names a class in a project module, like ``blog.apps.BlogConfig``."""
+        module, _, name = app.rpartition(".")
+        return module in modules and (name in modules[module].names or modules[module].open_namespace)
+
+    @staticmethod
+    def _check_cycles(modules: Dict[str, SourceModule], problems: Dict[str, List[str]]):
+        edges = {name: [(line, target) for line, target, names, eager in module.imports
+                        if eager and names and target in modules and target != name]
+                 for name, module in modules.items() if not module.error}
+
+        def reaches(start: str, goal: str) -> bool:
+            seen, stack = set(), [start]
+            while stack:
+                current = stack.pop()
+                if current == goal:
+                    return True
+                if current not in seen:
+                    seen.add(current)
+                    stack += [target for _, target in edges.get(current, [])]
+            return False
+
+        for name, module_edges in edges.items():
+            for line, target in module_edges:
+                if reaches(target, name):
+                    problems[modules[name].path].append(
+                        f"line {line}: circular import, {target!r} imports {name!r} back at module level")